@@ -4,6 +4,51 @@ author: Dan Blanchard
 """
 
 import argparse
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from functools import reduce
+import hashlib
+from itertools import repeat
+import json
+import os
+from pathlib import Path
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # See common/__init__.py
+from common.inputs import map_input, parse_prefixed_ints  # noqa: E402
+
+DIAL_SIZE = 100
+DEFAULT_CHUNK_SIZE = 64 * 1024 * 1024
+# Bytes at the start of the file and just before the checkpoint offset that
+# are hashed to tell whether a log was rewritten rather than appended to
+CHECKPOINT_HASH_SIZE = 64 * 1024
+
+
+@dataclass
+class DialSummary:
+    # Net rotation of the whole chunk, modulo the dial size
+    offset: int
+    # Times the dial lands on and passes through zero, indexed by the
+    # position the dial was pointing at before the chunk
+    zero_landings: np.ndarray
+    zero_passes: np.ndarray
+
+    @classmethod
+    def empty(cls) -> "DialSummary":
+        zeros = np.zeros(DIAL_SIZE, dtype=np.int64)
+        return cls(offset=0, zero_landings=zeros, zero_passes=zeros)
+
+    def combine(self, other: "DialSummary") -> "DialSummary":
+        # The other chunk starts wherever this one left the dial
+        shifted = (np.arange(DIAL_SIZE) + self.offset) % DIAL_SIZE
+        return DialSummary(
+            offset=(self.offset + other.offset) % DIAL_SIZE,
+            zero_landings=self.zero_landings + other.zero_landings[shifted],
+            zero_passes=self.zero_passes + other.zero_passes[shifted],
+        )
 
 
 def parse_line(line: str) -> tuple[str, int]:
@@ -13,69 +58,296 @@ def parse_line(line: str) -> tuple[str, int]:
     return direction, value
 
 
-def main(*, input_file: str, verbose: bool):
+def parse_rotations(data) -> tuple[np.ndarray, np.ndarray]:
+    # Each rotation is an L or R followed by its value
+    directions, values = parse_prefixed_ints(data, b"LR")
+    return np.where(directions == 0, -1, 1), values
+
+
+def crack_batch(mults: np.ndarray, values: np.ndarray, start: int = 50):
+    if not len(values):
+        return 0, 0
+    deltas = mults * values
+    # Unwrapped position after each rotation, then where each one started from
+    ends = start + np.cumsum(deltas)
+    start_positions = np.concatenate(([start], ends[:-1])) % 100
+    raw_positions = start_positions + deltas
+    passes = np.abs(raw_positions // 100)
+    positions = raw_positions % 100
+    # Same corrections as the sequential loop in crack_sequential
+    overcounted = ((positions == 0) & ((mults == 1) | (start_positions == 0))) | (
+        (start_positions == 0) & (mults == -1)
+    )
+    passes -= (passes > 0) & overcounted
+    return int(np.count_nonzero(positions == 0)), int(passes.sum())
+
+
+def summarize_rotations(mults: np.ndarray, values: np.ndarray) -> DialSummary:
+    starts = np.arange(DIAL_SIZE)
+    if not len(values):
+        return DialSummary.empty()
+    # Offsets from the unknown start position after and before each rotation
+    after = np.cumsum(mults * values) % DIAL_SIZE
+    before = np.concatenate(([0], after[:-1]))
+    # Landing on zero from start s means (s + after) % DIAL_SIZE == 0
+    landings = np.bincount(after, minlength=DIAL_SIZE)[-starts % DIAL_SIZE]
+    # Every full turn points at zero once. The remaining partial turn points
+    # at zero for a contiguous (cyclic) run of start positions, which we
+    # accumulate with a difference array over two laps of the dial.
+    remainders = values % DIAL_SIZE
+    run_starts = np.where(
+        mults == 1,
+        (DIAL_SIZE - remainders - before) % DIAL_SIZE,
+        (1 - before) % DIAL_SIZE,
+    )
+    run_edges = np.bincount(run_starts, minlength=2 * DIAL_SIZE) - np.bincount(
+        run_starts + remainders, minlength=2 * DIAL_SIZE
+    )
+    runs = np.cumsum(run_edges)
+    visits = runs[:DIAL_SIZE] + runs[DIAL_SIZE:] + (values // DIAL_SIZE).sum()
+    # A rotation that moves and lands on zero visits it as its last step,
+    # which is a landing rather than a pass. Rotating by 0 visits nothing
+    # but still counts as a landing when already at zero.
+    moving_landings = np.bincount(after[values > 0], minlength=DIAL_SIZE)[
+        -starts % DIAL_SIZE
+    ]
+    return DialSummary(
+        offset=int(after[-1]),
+        zero_landings=landings,
+        zero_passes=visits - moving_landings,
+    )
+
+
+def find_chunks(input_file: str, chunk_size: int) -> list[tuple[int, int]]:
+    with open(input_file, "rb") as file:
+        file_size = file.seek(0, 2)
+    return [
+        (start, min(start + chunk_size, file_size))
+        for start in range(0, file_size, chunk_size)
+    ]
+
+
+def summarize_chunk(input_file: str, start: int, end: int) -> DialSummary:
+    # A chunk owns every line that starts within [start, end)
+    with open(input_file, "rb") as file:
+        if start:
+            file.seek(start - 1)
+            if file.read(1) != b"\n":
+                file.readline()
+        line_start = file.tell()
+        data = b""
+        if line_start < end:
+            data = file.read(end - line_start)
+            if not data.endswith(b"\n"):
+                data += file.readline()
+    return summarize_rotations(*parse_rotations(data))
+
+
+def crack_parallel(input_file: str, workers: int, chunk_size: int, start: int = 50):
+    chunks = find_chunks(input_file, chunk_size)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # map yields in submission order, which is what combining requires
+        summaries = executor.map(
+            summarize_chunk,
+            repeat(input_file),
+            [chunk_start for chunk_start, _ in chunks],
+            [chunk_end for _, chunk_end in chunks],
+        )
+        summary = reduce(DialSummary.combine, summaries, DialSummary.empty())
+    return int(summary.zero_landings[start]), int(summary.zero_passes[start])
+
+
+@dataclass
+class Checkpoint:
+    # Everything needed to carry on from the end of the last complete line
+    offset: int = 0
+    position: int = 50
+    exact_zero_count: int = 0
+    passed_zero_count: int = 0
+    head_hash: str = ""
+    tail_hash: str = ""
+
+    @classmethod
+    def load(cls, checkpoint_file: str) -> "Checkpoint":
+        if not os.path.exists(checkpoint_file):
+            return cls()
+        with open(checkpoint_file, "r") as file:
+            return cls(**json.load(file))
+
+    def save(self, checkpoint_file: str):
+        # Write to a temporary file first so a crash never leaves a partial
+        # checkpoint behind
+        temp_file = f"{checkpoint_file}.tmp"
+        with open(temp_file, "w") as file:
+            json.dump(asdict(self), file)
+        os.replace(temp_file, checkpoint_file)
+
+
+def hash_log_range(file, start: int, end: int) -> str:
+    file.seek(start)
+    return hashlib.sha256(file.read(end - start)).hexdigest()
+
+
+def log_hashes(file, offset: int) -> tuple[str, str]:
+    return (
+        hash_log_range(file, 0, min(offset, CHECKPOINT_HASH_SIZE)),
+        hash_log_range(file, max(0, offset - CHECKPOINT_HASH_SIZE), offset),
+    )
+
+
+def crack_appended(
+    input_file: str, checkpoint: Checkpoint, include_partial_line: bool = True
+):
+    with open(input_file, "rb") as file:
+        file_size = file.seek(0, 2)
+        # If the log shrank or its hashed bytes changed, it wasn't just
+        # appended to, so replay it from the start
+        if checkpoint.offset > file_size or (
+            (checkpoint.head_hash, checkpoint.tail_hash)
+            != log_hashes(file, checkpoint.offset)
+        ):
+            checkpoint = Checkpoint()
+        file.seek(checkpoint.offset)
+        data = file.read()
+        # Only checkpoint complete lines, since the last one may still be
+        # being written. A log that is done growing can just be missing its
+        # final newline though, so the passwords can include it.
+        line_end = data.rfind(b"\n") + 1
+        mults, values = parse_rotations(data[:line_end])
+        exact_zero_count, passed_zero_count = crack_batch(
+            mults, values, checkpoint.position
+        )
+        offset = checkpoint.offset + line_end
+        head_hash, tail_hash = log_hashes(file, offset)
+    new_checkpoint = Checkpoint(
+        offset=offset,
+        position=(checkpoint.position + int((mults * values).sum())) % DIAL_SIZE,
+        exact_zero_count=checkpoint.exact_zero_count + exact_zero_count,
+        passed_zero_count=checkpoint.passed_zero_count + passed_zero_count,
+        head_hash=head_hash,
+        tail_hash=tail_hash,
+    )
+    partial_exact_count, partial_passed_count = crack_batch(
+        *parse_rotations(data[line_end:] if include_partial_line else b""),
+        new_checkpoint.position,
+    )
+    return (
+        new_checkpoint,
+        new_checkpoint.exact_zero_count + partial_exact_count,
+        new_checkpoint.passed_zero_count + partial_passed_count,
+    )
+
+
+def follow_log(
+    input_file: str, checkpoint_file: str | None, follow: bool, poll_interval: float
+):
+    checkpoint = Checkpoint.load(checkpoint_file) if checkpoint_file else Checkpoint()
+    last_stat = None
+    while True:
+        stat = os.stat(input_file)
+        if (stat.st_size, stat.st_mtime_ns) != last_stat:
+            checkpoint, exact_zero_count, passed_zero_count = crack_appended(
+                input_file, checkpoint, include_partial_line=not follow
+            )
+            if checkpoint_file:
+                checkpoint.save(checkpoint_file)
+            print(f"Password (exact): {exact_zero_count}")
+            print(f"Password (exact + passed): {exact_zero_count + passed_zero_count}")
+            last_stat = (stat.st_size, stat.st_mtime_ns)
+        if not follow:
+            return
+        time.sleep(poll_interval)
+
+
+def crack_sequential(lines, verbose: bool):
     position = 50
     exact_zero_count = 0
     passed_zero_count = 0
     if verbose:
         print(f"  - The dial starts by pointing at {position}")
-    with open(input_file, "r") as file:
-        lines = file.readlines()
-        for line in lines:
-            direction, value = parse_line(line)
-            # If we are turning right, we increase, left, we decrease
-            mult = 1 if direction == "R" else -1
-            start_pos = position
-            position += mult * value
-            # Count approximately how many times we passed through
-            # position 0, but needs correction for edge cases to handle
-            # the distinctions between leaving, landing, and passing zero
-            passes = abs(position // 100)
-            # Apply modulo to get final position in [0, 99]
-            position = position % 100
-            # Apply corrections for asymmetry in how floor division treats
-            # positive vs negative multiples of 100
-            if passes > 0:
-                # Subtract 1 in these cases where the formula overcounts:
-                #
-                # 1. ENDED at zero going RIGHT
-                #    Example: R48 from 52 → raw=100 → pos=0
-                #    Formula gives 1, but we LANDED on 0 (should be exact, not pass)
-                #
-                # 2. STARTED at zero and ENDED at zero
-                #    Example: L100 from 0 → raw=-100 → pos=0
-                #    Formula gives 1, but only visit is the landing (exact, not pass)
-                #
-                # 3. STARTED at zero and went LEFT
-                #    Example: L30 from 0 → raw=-30 → pos=70
-                #    Formula gives 1, but we started at 0, didn't pass through it
-                #
-                # The ONE case where we DON'T subtract when we END at zero:
-                # - ENDED at zero by going LEFT from non-zero
-                #   Example: L325 from 25 → raw=-300 → pos=0
-                #   We visit 0 four times: at 0, -100, -200, -300 (all ≡ 0 mod 100)
-                #   Should be: passes=3 (first three), exact=1 (final landing)
-                #   Formula gives: abs(-300 // 100) = 3 ✓
-                #   The formula naturally counts only intermediate visits, excluding
-                #   the final landing, so no correction needed!
-                if (position == 0 and (mult == 1 or start_pos == 0)) or (
-                    start_pos == 0 and mult == -1
-                ):
-                    passes -= 1
-            if position == 0:
-                exact_zero_count += 1
-            passed_zero_count += passes
-            if verbose:
+    for line in lines:
+        direction, value = parse_line(line)
+        # If we are turning right, we increase, left, we decrease
+        mult = 1 if direction == "R" else -1
+        start_pos = position
+        position += mult * value
+        # Count approximately how many times we passed through
+        # position 0, but needs correction for edge cases to handle
+        # the distinctions between leaving, landing, and passing zero
+        passes = abs(position // 100)
+        # Apply modulo to get final position in [0, 99]
+        position = position % 100
+        # Apply corrections for asymmetry in how floor division treats
+        # positive vs negative multiples of 100
+        if passes > 0:
+            # Subtract 1 in these cases where the formula overcounts:
+            #
+            # 1. ENDED at zero going RIGHT
+            #    Example: R48 from 52 → raw=100 → pos=0
+            #    Formula gives 1, but we LANDED on 0 (should be exact, not pass)
+            #
+            # 2. STARTED at zero and ENDED at zero
+            #    Example: L100 from 0 → raw=-100 → pos=0
+            #    Formula gives 1, but only visit is the landing (exact, not pass)
+            #
+            # 3. STARTED at zero and went LEFT
+            #    Example: L30 from 0 → raw=-30 → pos=70
+            #    Formula gives 1, but we started at 0, didn't pass through it
+            #
+            # The ONE case where we DON'T subtract when we END at zero:
+            # - ENDED at zero by going LEFT from non-zero
+            #   Example: L325 from 25 → raw=-300 → pos=0
+            #   We visit 0 four times: at 0, -100, -200, -300 (all ≡ 0 mod 100)
+            #   Should be: passes=3 (first three), exact=1 (final landing)
+            #   Formula gives: abs(-300 // 100) = 3 ✓
+            #   The formula naturally counts only intermediate visits, excluding
+            #   the final landing, so no correction needed!
+            if (position == 0 and (mult == 1 or start_pos == 0)) or (
+                start_pos == 0 and mult == -1
+            ):
+                passes -= 1
+        if position == 0:
+            exact_zero_count += 1
+        passed_zero_count += passes
+        if verbose:
+            print(
+                f"  - The dial is rotated {direction}{value} to point at {position}",
+                end="",
+            )
+            if passes:
                 print(
-                    f"  - The dial is rotated {direction}{value} to point at {position}",
+                    f"; during this rotation, it points at 0 {'once' if passes == 1 else f'{passes} times'}",
                     end="",
                 )
-                if passes:
-                    print(
-                        f"; during this rotation, it points at 0 {'once' if passes == 1 else f'{passes} times'}",
-                        end="",
-                    )
-                print()
+            print()
+    return exact_zero_count, passed_zero_count
+
+
+def main(
+    *,
+    input_file: str,
+    verbose: bool,
+    workers: int = 0,
+    chunk_size: int = 0,
+    checkpoint_file: str | None = None,
+    follow: bool = False,
+    poll_interval: float = 1.0,
+):
+    if checkpoint_file or follow:
+        follow_log(input_file, checkpoint_file, follow, poll_interval)
+        return
+    # The loop is kept for verbose output and as a reference for the
+    # vectorized engine, which must agree with it exactly
+    if verbose:
+        with open(input_file, "r") as file:
+            exact_zero_count, passed_zero_count = crack_sequential(file, verbose)
+    elif workers:
+        exact_zero_count, passed_zero_count = crack_parallel(
+            input_file, workers, chunk_size or DEFAULT_CHUNK_SIZE
+        )
+    else:
+        mults, values = parse_rotations(map_input(input_file))
+        exact_zero_count, passed_zero_count = crack_batch(mults, values)
 
     print(f"Password (exact): {exact_zero_count}")
     print(f"Password (exact + passed): {exact_zero_count + passed_zero_count}")
@@ -89,6 +361,44 @@ if __name__ == "__main__":
     parser.add_argument(
         "--verbose", "-v", action="store_true", help="Print debug messages"
     )
+    parser.add_argument(
+        "--workers",
+        "-w",
+        default=0,
+        type=int,
+        help="Split the file into chunks and process them with this many processes",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        default=DEFAULT_CHUNK_SIZE,
+        type=int,
+        help="Size in bytes of each chunk when using --workers",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        type=str,
+        help="Save the dial state here and only process what was appended since",
+    )
+    parser.add_argument(
+        "--follow",
+        "-f",
+        action="store_true",
+        help="Keep watching the file and print new passwords as it grows",
+    )
+    parser.add_argument(
+        "--poll-interval",
+        default=1.0,
+        type=float,
+        help="Seconds to wait between checks for new data when using --follow",
+    )
     args = parser.parse_args()
 
-    main(input_file=args.input_file, verbose=args.verbose)
+    main(
+        input_file=args.input_file,
+        verbose=args.verbose,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        checkpoint_file=args.checkpoint,
+        follow=args.follow,
+        poll_interval=args.poll_interval,
+    )
@@ -4,14 +4,27 @@ author: Dan Blanchard
 """
 
 import argparse
+from itertools import combinations
+import json
+from math import prod
+import os
+from pathlib import Path
 import re
+import sys
 
+import numpy as np
 
-def parse_line(line: str):
-    line = line.strip()
-    for range in line.split(","):
-        start, end = range.split("-")
-        yield int(start), int(end)
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # See common/__init__.py
+from common.inputs import map_input, parse_int_records  # noqa: E402
+
+INDEX_ARRAYS = ("ids", "prefix_sums", "ids2", "prefix_sums2")
+
+
+def parse_input_file(input_file: str) -> list[tuple[int, int]]:
+    return [
+        (start, end)
+        for start, end in parse_int_records(map_input(input_file), 2).tolist()
+    ]
 
 
 def is_invalid_id(id: int):
@@ -22,22 +35,182 @@ def is_invalid_id2(id: int):
     return bool(re.match(r"^(.+)\1+$", str(id)))
 
 
-def main(*, input_file: str, verbose: bool):
+def repeat_multiplier(length: int, block_length: int) -> int:
+    # Repeating a block p of block_length digits to fill length digits is
+    # p * multiplier, e.g. 11 for two 1-digit blocks or 1001 for two 3-digit
+    return (10**length - 1) // (10**block_length - 1)
+
+
+def sum_repeated_ids(start: int, end: int, length: int, block_length: int) -> int:
+    # Sum of every ID in [start, end] with exactly length digits that is a
+    # block of block_length digits repeated
+    multiplier = repeat_multiplier(length, block_length)
+    low = max(10 ** (block_length - 1), -(-start // multiplier))
+    high = min(10**block_length - 1, end // multiplier)
+    if low > high:
+        return 0
+    # Arithmetic series of the blocks, times the multiplier
+    return multiplier * (low + high) * (high - low + 1) // 2
+
+
+def prime_factors(n: int) -> list[int]:
+    factors = []
+    factor = 2
+    while factor * factor <= n:
+        if n % factor == 0:
+            factors.append(factor)
+            while n % factor == 0:
+                n //= factor
+        factor += 1
+    if n > 1:
+        factors.append(n)
+    return factors
+
+
+def sum_invalid_ids(start: int, end: int) -> tuple[int, int]:
     invalid_sum = 0
     invalid_sum2 = 0
-    with open(input_file, "r") as file:
-        lines = file.readlines()
-        for line in lines:
-            for start, end in parse_line(line):
-                for id in range(start, end + 1):
-                    if is_invalid_id(id):
-                        invalid_sum += id
-                        if verbose:
-                            print(f"Invalid ID (Part 1): {id}")
-                    if is_invalid_id2(id):
-                        invalid_sum2 += id
-                        if verbose:
-                            print(f"Invalid ID (Part 2): {id}")
+    for length in range(len(str(start)), len(str(end)) + 1):
+        low = max(start, 10 ** (length - 1))
+        high = min(end, 10**length - 1)
+        if length % 2 == 0:
+            invalid_sum += sum_repeated_ids(low, high, length, length // 2)
+        # An ID made of repeated blocks is also made of repeated blocks of
+        # length / p for some prime p dividing the length, so we only need
+        # those block lengths. Blocks for several primes overlap at the
+        # block length divided by all of them, so apply inclusion-exclusion.
+        primes = prime_factors(length)
+        for num_primes in range(1, len(primes) + 1):
+            sign = 1 if num_primes % 2 else -1
+            for subset in combinations(primes, num_primes):
+                invalid_sum2 += sign * sum_repeated_ids(
+                    low, high, length, length // prod(subset)
+                )
+    return invalid_sum, invalid_sum2
+
+
+def repeated_block_lengths(length: int) -> list[int]:
+    # Every ID made of repeated blocks is also made of repeated blocks of
+    # one of these lengths
+    return [length // prime for prime in prime_factors(length)]
+
+
+class InvalidIdIndex:
+    def __init__(
+        self,
+        max_digits: int,
+        ids: np.ndarray,
+        prefix_sums: np.ndarray,
+        ids2: np.ndarray,
+        prefix_sums2: np.ndarray,
+    ):
+        self.max_digits = max_digits
+        self.ids = ids
+        self.prefix_sums = prefix_sums
+        self.ids2 = ids2
+        self.prefix_sums2 = prefix_sums2
+
+    @classmethod
+    def build(cls, max_digits: int) -> "InvalidIdIndex":
+        # Prefix sums are stored as uint64, so make sure the largest fits
+        if sum_invalid_ids(1, 10**max_digits - 1)[1] >= 2**64:
+            raise ValueError(f"Sum of invalid IDs up to {max_digits} digits overflows")
+        id_arrays = []
+        id_arrays2 = []
+        for length in range(2, max_digits + 1):
+            for block_length in repeated_block_lengths(length):
+                blocks = np.arange(
+                    10 ** (block_length - 1), 10**block_length, dtype=np.uint64
+                )
+                repeated = blocks * np.uint64(repeat_multiplier(length, block_length))
+                id_arrays2.append(repeated)
+                if block_length * 2 == length:
+                    id_arrays.append(repeated)
+        ids = np.unique(np.concatenate(id_arrays or [np.empty(0, dtype=np.uint64)]))
+        ids2 = np.unique(np.concatenate(id_arrays2 or [np.empty(0, dtype=np.uint64)]))
+        return cls(
+            max_digits,
+            ids,
+            np.concatenate(([0], np.cumsum(ids, dtype=np.uint64))).astype(np.uint64),
+            ids2,
+            np.concatenate(([0], np.cumsum(ids2, dtype=np.uint64))).astype(np.uint64),
+        )
+
+    def save(self, index_dir: str):
+        os.makedirs(index_dir, exist_ok=True)
+        for name in INDEX_ARRAYS:
+            np.save(os.path.join(index_dir, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(index_dir, "index.json"), "w") as file:
+            json.dump({"max_digits": self.max_digits}, file)
+
+    @classmethod
+    def load(cls, index_dir: str) -> "InvalidIdIndex":
+        # Memory-map the arrays so every process reading the index shares
+        # the same pages instead of loading its own copy
+        with open(os.path.join(index_dir, "index.json"), "r") as file:
+            max_digits = json.load(file)["max_digits"]
+        arrays = [
+            np.load(os.path.join(index_dir, f"{name}.npy"), mmap_mode="r")
+            for name in INDEX_ARRAYS
+        ]
+        return cls(max_digits, *arrays)
+
+    def sum_invalid_ids(self, start: int, end: int) -> tuple[int, int]:
+        if start > end:
+            return 0, 0
+        if len(str(end)) > self.max_digits:
+            raise ValueError(
+                f"Range {start}-{end} exceeds index bound of {self.max_digits} digits"
+            )
+        sums = []
+        for ids, prefix_sums in (
+            (self.ids, self.prefix_sums),
+            (self.ids2, self.prefix_sums2),
+        ):
+            low = np.searchsorted(ids, np.uint64(start), side="left")
+            high = np.searchsorted(ids, np.uint64(end), side="right")
+            sums.append(int(prefix_sums[high]) - int(prefix_sums[low]))
+        return sums[0], sums[1]
+
+
+def load_or_build_index(index_dir: str, max_digits: int) -> InvalidIdIndex:
+    if os.path.exists(os.path.join(index_dir, "index.json")):
+        index = InvalidIdIndex.load(index_dir)
+        if index.max_digits >= max_digits:
+            return index
+    index = InvalidIdIndex.build(max_digits)
+    index.save(index_dir)
+    return index
+
+
+def main(*, input_file: str, verbose: bool, index_dir: str | None = None):
+    invalid_sum = 0
+    invalid_sum2 = 0
+    ranges = parse_input_file(input_file)
+    index = None
+    if index_dir and not verbose:
+        max_digits = max(len(str(end)) for _, end in ranges)
+        index = load_or_build_index(index_dir, max_digits)
+    for start, end in ranges:
+        # Checking each ID individually is only needed to list them
+        if not verbose:
+            range_sum, range_sum2 = (
+                index.sum_invalid_ids(start, end)
+                if index is not None
+                else sum_invalid_ids(start, end)
+            )
+            invalid_sum += range_sum
+            invalid_sum2 += range_sum2
+            continue
+        for id in range(start, end + 1):
+            if is_invalid_id(id):
+                invalid_sum += id
+                if verbose:
+                    print(f"Invalid ID (Part 1): {id}")
+            if is_invalid_id2(id):
+                invalid_sum2 += id
+                if verbose:
+                    print(f"Invalid ID (Part 2): {id}")
 
     print(f"Invalid sum (Part 1): {invalid_sum}")
     print(f"Invalid sum (Part 2): {invalid_sum2}")
@@ -51,6 +224,11 @@ if __name__ == "__main__":
     parser.add_argument(
         "--verbose", "-v", action="store_true", help="Print debug messages"
     )
+    parser.add_argument(
+        "--index",
+        type=str,
+        help="Directory of a precomputed invalid ID index to use, built if missing",
+    )
     args = parser.parse_args()
 
-    main(input_file=args.input_file, verbose=args.verbose)
+    main(input_file=args.input_file, verbose=args.verbose, index_dir=args.index)
@@ -5,6 +5,23 @@ author: Dan Blanchard
 
 import argparse
 from collections import defaultdict
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    as_completed,
+    wait,
+)
+
+import numpy as np
+
+# Number of joltages to select digits from at once in batch mode
+BATCH_CELLS = 1 << 20
+DEFAULT_BLOCK_SIZE = 16 * 1024 * 1024
+# Rough costs of a batch pass, in units of the extra time per digit the stack
+# takes over building the batch lookup tables: a fixed overhead, plus a cost
+# for every bank in the pass
+PASS_OVERHEAD = 750
+PASS_COST_PER_BANK = 4
 
 
 def parse_line(line: str):
@@ -12,49 +29,177 @@ def parse_line(line: str):
 
 
 def find_largest_n_digit_num(joltages: list[int], n: int) -> int:
-    # Pick first n digits as a starting point of comparison
-    digit_list = []
-
-    # Store where each digit is located
-    digit_locations = defaultdict(list)
-    for i, digit in enumerate(joltages):
-        digit_locations[digit].append(i)
+    if len(joltages) < n:
+        raise ValueError(f"Cannot pick {n} digits from {len(joltages)} joltages")
 
-    digit_index = -1
-    for digit_pos in range(n):
-        min_index = digit_index + 1
-        max_index = len(joltages) - (n - digit_pos)
-        greatest_digit = 0
-        for digit, locations in digit_locations.items():
-            for location in locations:
-                if location > max_index:
-                    break
-                if location >= min_index and digit > greatest_digit:
-                    greatest_digit = digit
-                    digit_index = location
-                    break
-        digit_list.append(greatest_digit)
-
-    if len(digit_list) != n:
-        raise RuntimeError(
-            f"Calculated invalid digit list of length {len(digit_list)} when desired {n}"
+    # Keep a stack of chosen digits that is non-increasing, popping smaller
+    # digits whenever a bigger one comes along and we can still afford to
+    # skip digits
+    digit_list = []
+    skips_left = len(joltages) - n
+    for digit in joltages:
+        while skips_left and digit_list and digit_list[-1] < digit:
+            digit_list.pop()
+            skips_left -= 1
+        digit_list.append(digit)
+
+    largest_num = 0
+    for digit in digit_list[:n]:
+        largest_num = largest_num * 10 + digit
+    return largest_num
+
+
+def parse_banks(data: bytes) -> dict[int, np.ndarray]:
+    # Group banks by length so that each group is a rectangular digit array
+    banks_by_length = defaultdict(list)
+    for line in data.split():
+        banks_by_length[len(line)].append(line)
+    return {
+        length: (
+            np.frombuffer(b"".join(lines), dtype=np.uint8).reshape(len(lines), length)
+            - ord("0")
         )
+        for length, lines in banks_by_length.items()
+    }
+
+
+def find_largest_n_digit_nums(banks: np.ndarray, n: int) -> np.ndarray:
+    num_banks, length = banks.shape
+    if length < n:
+        raise ValueError(f"Cannot pick {n} digits from {length} joltages")
+
+    # next_locations[digit][row, i] is the first index >= i of that digit in
+    # the row, or length if there isn't one
+    next_locations = np.full((10, num_banks, length + 1), length, dtype=np.int32)
+    for digit in range(10):
+        locations = np.where(banks == digit, np.arange(length), length)
+        next_locations[digit, :, :length] = np.minimum.accumulate(
+            locations[:, ::-1], axis=1
+        )[:, ::-1]
+
+    # For each output digit, take the greatest digit that still leaves room
+    # for the rest, preferring its earliest location
+    rows = np.arange(num_banks)
+    min_index = np.zeros(num_banks, dtype=np.int64)
+    digit_list = np.empty((num_banks, n), dtype=np.int64)
+    for digit_pos in range(n):
+        max_index = length - (n - digit_pos)
+        chosen = np.full(num_banks, -1)
+        for digit in range(9, -1, -1):
+            location = next_locations[digit, rows, min_index]
+            found = (chosen < 0) & (location <= max_index)
+            chosen[found] = digit
+            min_index[found] = location[found] + 1
+        digit_list[:, digit_pos] = chosen
+    return digit_list
 
-    return int("".join(str(digit) for digit in digit_list))
 
+def prefer_stack(num_banks: int, length: int, n: int) -> bool:
+    # The batch engine makes ten passes per output digit, so with few or long
+    # banks, or n close to the length, running the stack on each bank is
+    # cheaper
+    return num_banks * length < n * (PASS_OVERHEAD + PASS_COST_PER_BANK * num_banks)
 
-def main(*, input_file: str, verbose: bool, n: int):
-    total = 0
-    with open(input_file, "r") as file:
-        lines = file.readlines()
-        for line in lines:
-            joltages = parse_line(line)
-            largest_num = find_largest_n_digit_num(joltages, n)
-            total += largest_num
-            if verbose:
-                print(f"{line.strip()}: largest is {largest_num}; total is {total}")
 
-    print(f"Total joltage: {total}")
+def total_largest_n_digit_nums(data: bytes, n: int) -> int:
+    total = 0
+    for length, banks in parse_banks(data).items():
+        # Work through the banks in blocks to bound the size of the lookup
+        # tables in find_largest_n_digit_nums
+        block_size = max(1, BATCH_CELLS // (length + 1))
+        for block_start in range(0, len(banks), block_size):
+            block = banks[block_start : block_start + block_size]
+            if prefer_stack(len(block), length, n):
+                total += sum(
+                    find_largest_n_digit_num(joltages, n) for joltages in block.tolist()
+                )
+                continue
+            digit_list = find_largest_n_digit_nums(block, n)
+            # Sum each digit position across banks before applying place
+            # values, so the total stays exact however many digits there are
+            block_total = 0
+            for place_sum in digit_list.sum(axis=0).tolist():
+                block_total = block_total * 10 + place_sum
+            total += block_total
+    return total
+
+
+def read_blocks(input_file: str, block_size: int):
+    # Yield blocks of whole lines, carrying any partial line into the next
+    with open(input_file, "rb") as file:
+        remainder = b""
+        while block := file.read(block_size):
+            block = remainder + block
+            line_end = block.rfind(b"\n") + 1
+            remainder = block[line_end:]
+            if line_end:
+                yield block[:line_end]
+        if remainder:
+            yield remainder
+
+
+def total_block(block: bytes, ns: list[int]) -> list[int]:
+    return [total_largest_n_digit_nums(block, n) for n in ns]
+
+
+def total_joltages(
+    input_file: str, ns: list[int], workers: int, block_size: int
+) -> list[int]:
+    totals = [0] * len(ns)
+
+    def add_block_totals(block_totals):
+        for i, block_total in enumerate(block_totals):
+            totals[i] += block_total
+
+    if not workers:
+        for block in read_blocks(input_file, block_size):
+            add_block_totals(total_block(block, ns))
+        return totals
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        for block in read_blocks(input_file, block_size):
+            # Only keep a couple of blocks per worker in flight so memory
+            # stays bounded no matter how big the file is
+            if len(pending) >= 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    add_block_totals(future.result())
+            pending.add(executor.submit(total_block, block, ns))
+        for future in as_completed(pending):
+            add_block_totals(future.result())
+    return totals
+
+
+def main(
+    *,
+    input_file: str,
+    verbose: bool,
+    n: int | list[int],
+    workers: int = 0,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+):
+    ns = [n] if isinstance(n, int) else list(n)
+    # Only label totals by their length when there is more than one
+    labels = [f" ({n} digits)" if len(ns) > 1 else "" for n in ns]
+    if not verbose:
+        totals = total_joltages(input_file, ns, workers, block_size)
+    else:
+        totals = [0] * len(ns)
+        with open(input_file, "r") as file:
+            lines = file.readlines()
+            for line in lines:
+                joltages = parse_line(line)
+                for i, n in enumerate(ns):
+                    largest_num = find_largest_n_digit_num(joltages, n)
+                    totals[i] += largest_num
+                    print(
+                        f"{line.strip()}: largest{labels[i]} is {largest_num}; "
+                        f"total is {totals[i]}"
+                    )
+
+    for label, total in zip(labels, totals):
+        print(f"Total joltage{label}: {total}")
 
 
 if __name__ == "__main__":
@@ -62,10 +207,35 @@ if __name__ == "__main__":
         description="Calculate the total joltage for day 3 of Advent of Code."
     )
     parser.add_argument("input_file", type=str, help="Path to the input file")
-    parser.add_argument("-n", default=2, type=int, help="Length of number of to find")
+    parser.add_argument(
+        "-n",
+        default=[2],
+        type=int,
+        nargs="+",
+        help="Length of number of to find (can give several to compute in one pass)",
+    )
+    parser.add_argument(
+        "--workers",
+        "-w",
+        default=0,
+        type=int,
+        help="Number of processes to total blocks of the file with",
+    )
+    parser.add_argument(
+        "--block-size",
+        default=DEFAULT_BLOCK_SIZE,
+        type=int,
+        help="Size in bytes of the blocks the file is read in",
+    )
     parser.add_argument(
         "--verbose", "-v", action="store_true", help="Print debug messages"
     )
     args = parser.parse_args()
 
-    main(input_file=args.input_file, verbose=args.verbose, n=args.n)
+    main(
+        input_file=args.input_file,
+        verbose=args.verbose,
+        n=args.n,
+        workers=args.workers,
+        block_size=args.block_size,
+    )
@@ -4,6 +4,22 @@ author: Dan Blanchard
 """
 
 import argparse
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from pathlib import Path
+import sys
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # See common/__init__.py
+from common.inputs import map_input, read_grid, split_lines  # noqa: E402
+
+NEIGHBOR_DELTAS = [
+    (row_delta, col_delta)
+    for row_delta in (-1, 0, 1)
+    for col_delta in (-1, 0, 1)
+    if row_delta or col_delta
+]
 
 
 def parse_line(line: str):
@@ -12,10 +28,8 @@ def parse_line(line: str):
 
 def parse_input_file(input_file: str):
     grid = []
-    with open(input_file, "r") as file:
-        lines = file.readlines()
-        for line in lines:
-            grid.append(parse_line(line))
+    for line in split_lines(map_input(input_file)):
+        grid.append(parse_line(str(line, "ascii")))
     return grid
 
 
@@ -70,20 +84,178 @@ def get_adjacent_counts(grid: list[list[str]]) -> list[list[int]]:
     return adjacent_counts
 
 
-def main(*, input_file: str, verbose: bool):
-    grid = parse_input_file(input_file)
-    accessible_spots = find_accessible_spots(grid)
-    if verbose:
-        print_accessible_spots(accessible_spots, grid)
-    print(f"Num accessible spots: {len(accessible_spots)}")
-
-    total_removed = len(accessible_spots)
+def peel_accessible_rolls(grid: list[list[str]]) -> list[int]:
+    # Neighbor counts only ever go down as rolls are removed, so compute them
+    # once and only revisit the neighbors of removed rolls afterwards
+    adjacent_counts = get_adjacent_counts(grid)
+    accessible_spots = [
+        (row_idx, col_idx)
+        for row_idx, grid_row in enumerate(grid)
+        for col_idx, spot in enumerate(grid_row)
+        if spot == "@" and adjacent_counts[row_idx][col_idx] < 4
+    ]
+    round_counts = []
     while accessible_spots:
+        round_counts.append(len(accessible_spots))
         remove_accessible_rolls(accessible_spots, grid)
-        accessible_spots = find_accessible_spots(grid)
-        total_removed += len(accessible_spots)
+        newly_accessible_spots = []
+        for row_idx, col_idx in accessible_spots:
+            for row_delta, col_delta in NEIGHBOR_DELTAS:
+                neighbor_row = row_idx + row_delta
+                neighbor_col = col_idx + col_delta
+                if not (
+                    0 <= neighbor_row < len(grid)
+                    and 0 <= neighbor_col < len(grid[neighbor_row])
+                    and grid[neighbor_row][neighbor_col] == "@"
+                ):
+                    continue
+                adjacent_counts[neighbor_row][neighbor_col] -= 1
+                # Every remaining roll had at least 4 neighbors at the start of
+                # the round, so each one is only added as it drops to 3
+                if adjacent_counts[neighbor_row][neighbor_col] == 3:
+                    newly_accessible_spots.append((neighbor_row, neighbor_col))
+        accessible_spots = newly_accessible_spots
+    return round_counts
+
+
+def parse_grid_array(data) -> np.ndarray:
+    # Pad any short rows with empty spots so the grid is rectangular
+    return read_grid(data, fill=b".") == ord("@")
+
+
+def get_adjacent_counts_array(rolls: np.ndarray) -> np.ndarray:
+    # Sum the eight shifted copies of the grid, with a border of empty spots
+    padded = np.pad(rolls, 1).view(np.uint8)
+    num_rows, num_cols = rolls.shape
+    adjacent_counts = np.zeros(rolls.shape, dtype=np.uint8)
+    for row_delta, col_delta in NEIGHBOR_DELTAS:
+        adjacent_counts += padded[
+            1 + row_delta : 1 + row_delta + num_rows,
+            1 + col_delta : 1 + col_delta + num_cols,
+        ]
+    return adjacent_counts
+
+
+def peel_accessible_rolls_array(rolls: np.ndarray) -> list[int]:
+    adjacent_counts = get_adjacent_counts_array(rolls)
+    round_counts = []
+    while True:
+        accessible = rolls & (adjacent_counts < 4)
+        round_count = int(np.count_nonzero(accessible))
+        if not round_count:
+            return round_counts
+        round_counts.append(round_count)
+        rolls &= ~accessible
+        # Counts include every roll, so removing rolls can never underflow them
+        adjacent_counts -= get_adjacent_counts_array(accessible)
+
+
+# Both copies of the grid used by peel_accessible_rolls_tiled, as seen by
+# each worker process
+_shared_memory = None
+_shared_grids = None
+
 
-    print(f"Total removed: {total_removed}")
+def attach_shared_grids(name: str, shape: tuple[int, int]):
+    global _shared_memory, _shared_grids
+    _shared_memory = shared_memory.SharedMemory(name=name)
+    _shared_grids = np.ndarray((2, *shape), dtype=bool, buffer=_shared_memory.buf)
+
+
+def peel_band(current: int, start: int, end: int) -> int:
+    # Remove the accessible rolls in rows [start, end) of the current grid,
+    # writing the band into the other grid. Neighbor counts need the rows
+    # just outside the band too, which other workers only read this round.
+    rolls = _shared_grids[current]
+    halo_start = max(start - 1, 0)
+    halo_end = min(end + 1, len(rolls))
+    adjacent_counts = get_adjacent_counts_array(rolls[halo_start:halo_end])[
+        start - halo_start : end - halo_start
+    ]
+    band = rolls[start:end]
+    accessible = band & (adjacent_counts < 4)
+    np.logical_and(band, ~accessible, out=_shared_grids[1 - current][start:end])
+    return int(np.count_nonzero(accessible))
+
+
+def peel_accessible_rolls_tiled(
+    rolls: np.ndarray, workers: int, band_rows: int = 0
+) -> list[int]:
+    num_rows = len(rolls)
+    band_rows = band_rows or max(1, -(-num_rows // (4 * workers)))
+    bands = [
+        (start, min(start + band_rows, num_rows))
+        for start in range(0, num_rows, band_rows)
+    ]
+    memory = shared_memory.SharedMemory(create=True, size=max(2 * rolls.size, 1))
+    try:
+        # Each round reads one grid and writes the other, so no band changes
+        # while a neighboring band is still reading it
+        grids = np.ndarray((2, *rolls.shape), dtype=bool, buffer=memory.buf)
+        grids[0] = rolls
+        current = 0
+        active_bands = [True] * len(bands)
+        round_counts = []
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=attach_shared_grids,
+            initargs=(memory.name, rolls.shape),
+        ) as executor:
+            while True:
+                futures = {}
+                for i, (start, end) in enumerate(bands):
+                    if active_bands[i]:
+                        futures[i] = executor.submit(peel_band, current, start, end)
+                    else:
+                        grids[1 - current][start:end] = grids[current][start:end]
+                band_counts = [
+                    futures[i].result() if i in futures else 0
+                    for i in range(len(bands))
+                ]
+                current = 1 - current
+                if not any(band_counts):
+                    break
+                round_counts.append(sum(band_counts))
+                # Only bands that changed, or border one that did, can have
+                # newly accessible rolls
+                active_bands = [
+                    any(band_counts[max(i - 1, 0) : i + 2]) for i in range(len(bands))
+                ]
+        rolls[:] = grids[current]
+        del grids
+    finally:
+        memory.close()
+        memory.unlink()
+    return round_counts
+
+
+def main(
+    *,
+    input_file: str,
+    verbose: bool,
+    backend: str = "numpy",
+    workers: int = 0,
+    band_rows: int = 0,
+):
+    # The printed grid needs the list backend
+    if backend == "numpy" and not verbose:
+        rolls = parse_grid_array(map_input(input_file))
+        round_counts = (
+            peel_accessible_rolls_tiled(rolls, workers, band_rows)
+            if workers
+            else peel_accessible_rolls_array(rolls)
+        )
+    else:
+        grid = parse_input_file(input_file)
+        if verbose:
+            print_accessible_spots(find_accessible_spots(grid), grid)
+        round_counts = peel_accessible_rolls(grid)
+    print(f"Num accessible spots: {round_counts[0] if round_counts else 0}")
+    if verbose:
+        for round_num, round_count in enumerate(round_counts, start=1):
+            print(f"Round {round_num} removed: {round_count}")
+
+    print(f"Total removed: {sum(round_counts)}")
 
 
 if __name__ == "__main__":
@@ -94,6 +266,31 @@ if __name__ == "__main__":
     parser.add_argument(
         "--verbose", "-v", action="store_true", help="Print debug messages"
     )
+    parser.add_argument(
+        "--backend",
+        choices=("numpy", "lists"),
+        default="numpy",
+        help="Store the grid as a NumPy array or as nested lists of spots",
+    )
+    parser.add_argument(
+        "--workers",
+        "-w",
+        default=0,
+        type=int,
+        help="Split the NumPy grid into bands of rows peeled by this many processes",
+    )
+    parser.add_argument(
+        "--band-rows",
+        default=0,
+        type=int,
+        help="Number of rows in each band when using --workers",
+    )
     args = parser.parse_args()
 
-    main(input_file=args.input_file, verbose=args.verbose)
+    main(
+        input_file=args.input_file,
+        verbose=args.verbose,
+        backend=args.backend,
+        workers=args.workers,
+        band_rows=args.band_rows,
+    )
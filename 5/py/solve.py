@@ -4,27 +4,45 @@ author: Dan Blanchard
 """
 
 import argparse
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from pathlib import Path
+import sys
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # See common/__init__.py
+from common.inputs import (  # noqa: E402
+    map_input,
+    parse_int_records,
+    parse_ints,
+    split_blocks,
+    split_sections,
+)
+
+# Bytes of ingredient lines to check against the index at once
+DEFAULT_CHUNK_SIZE = 1 << 20
 
 
 def parse_line(line: str):
     return list(line.strip())
 
 
+def split_input(data) -> tuple[memoryview, memoryview]:
+    # Fresh ranges come first, then a blank line and the ingredients
+    fresh_ranges, *rest = split_sections(data, maxsplit=1)
+    return fresh_ranges, rest[0] if rest else memoryview(b"")
+
+
+def parse_fresh_ranges(data) -> list[tuple[int, int]]:
+    return [(start, end) for start, end in parse_int_records(data, 2).tolist()]
+
+
 def parse_input_file(input_file: str):
-    fresh_ranges = []
-    available_ingredients = set()
-    with open(input_file, "r") as file:
-        saw_blank = False
-        for line in file:
-            if not line.strip():
-                saw_blank = True
-                continue
-            if saw_blank:
-                available_ingredients.add(int(line.strip()))
-            else:
-                start, end = line.strip().split("-")
-                fresh_ranges.append((int(start), int(end)))
-    return fresh_ranges, available_ingredients
+    fresh_ranges, ingredients = split_input(map_input(input_file))
+    return parse_fresh_ranges(fresh_ranges), set(parse_ints(ingredients).tolist())
 
 
 def find_fresh_ingredients(fresh_ranges, available_ingredients):
@@ -60,22 +78,217 @@ def collapse_fresh_ranges(fresh_ranges):
     return collapsed_ranges
 
 
-def main(*, input_file: str, verbose: bool):
+class FreshRangeIndex:
+    def __init__(self, starts: array, ends: array):
+        # Expects sorted, disjoint ranges like collapse_fresh_ranges returns
+        self.starts = starts
+        self.ends = ends
+        # prefix_lengths[i] is the number of IDs covered by the first i ranges
+        self.prefix_lengths = array(
+            "q",
+            accumulate(
+                ((end - start) + 1 for start, end in zip(starts, ends)), initial=0
+            ),
+        )
+
+    @classmethod
+    def from_collapsed_ranges(
+        cls, collapsed_ranges: list[tuple[int, int]]
+    ) -> "FreshRangeIndex":
+        return cls(
+            array("q", (start for start, _ in collapsed_ranges)),
+            array("q", (end for _, end in collapsed_ranges)),
+        )
+
+    def ranges(self):
+        return zip(self.starts, self.ends)
+
+    def __contains__(self, ingredient: int) -> bool:
+        i = bisect_right(self.starts, ingredient) - 1
+        return i >= 0 and ingredient <= self.ends[i]
+
+    def contains_all(self, ingredients) -> np.ndarray:
+        ingredients = np.asarray(ingredients, dtype=np.int64)
+        starts = np.frombuffer(self.starts, dtype=np.int64)
+        ends = np.frombuffer(self.ends, dtype=np.int64)
+        i = np.searchsorted(starts, ingredients, side="right") - 1
+        # Clamp so that ingredients before the first range can be looked up
+        return (i >= 0) & (ingredients <= ends[np.maximum(i, 0)])
+
+    def count_up_to(self, ingredient: int) -> int:
+        i = bisect_right(self.starts, ingredient) - 1
+        if i < 0:
+            return 0
+        return (
+            self.prefix_lengths[i] + min(ingredient, self.ends[i]) - self.starts[i] + 1
+        )
+
+    def count_fresh_ids(self, start: int, end: int) -> int:
+        if start > end:
+            return 0
+        return self.count_up_to(end) - self.count_up_to(start - 1)
+
+    def total_fresh_ids(self) -> int:
+        return self.prefix_lengths[-1]
+
+
+class FreshRangeSet:
+    def __init__(self, fresh_ranges=()):
+        # Sorted, disjoint ranges, kept merged the same way collapse_fresh_ranges
+        # merges them, so ranges that only touch stay separate
+        self.starts = []
+        self.ends = []
+        self.covered = 0
+        self.update(fresh_ranges)
+
+    def add(self, start: int, end: int):
+        # Every range from lo up to hi overlaps the new one and gets merged in
+        lo = bisect_left(self.ends, start)
+        hi = bisect_right(self.starts, end)
+        if lo < hi:
+            start = min(start, self.starts[lo])
+            end = max(end, self.ends[hi - 1])
+            self.covered -= sum(
+                (self.ends[i] - self.starts[i]) + 1 for i in range(lo, hi)
+            )
+        self.starts[lo:hi] = [start]
+        self.ends[lo:hi] = [end]
+        self.covered += (end - start) + 1
+
+    def update(self, fresh_ranges):
+        for start, end in fresh_ranges:
+            self.add(start, end)
+
+    def ranges(self):
+        return zip(self.starts, self.ends)
+
+    def __contains__(self, ingredient: int) -> bool:
+        i = bisect_right(self.starts, ingredient) - 1
+        return i >= 0 and ingredient <= self.ends[i]
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def total_fresh_ids(self) -> int:
+        return self.covered
+
+    def to_index(self) -> FreshRangeIndex:
+        return FreshRangeIndex(array("q", self.starts), array("q", self.ends))
+
+
+def load_fresh_range_set(input_file: str, fresh_range_set=None) -> FreshRangeSet:
+    if fresh_range_set is None:
+        fresh_range_set = FreshRangeSet()
+    fresh_ranges, _ = split_input(map_input(input_file))
+    fresh_range_set.update(parse_fresh_ranges(fresh_ranges))
+    return fresh_range_set
+
+
+def collapse_fresh_range_arrays(
+    starts: np.ndarray, ends: np.ndarray
+) -> tuple[array, array]:
+    # Same merging as collapse_fresh_ranges, but on whole arrays: a range
+    # starts a new collapsed range when it begins after every earlier one ends
+    order = np.lexsort((ends, starts))
+    starts = starts[order]
+    ends = np.maximum.accumulate(ends[order])
+    is_new = np.ones(len(starts), dtype=bool)
+    is_new[1:] = starts[1:] > ends[:-1]
+    is_last = np.roll(is_new, -1)
+    return array("q", starts[is_new].tobytes()), array("q", ends[is_last].tobytes())
+
+
+def stream_input_file(input_file: str, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    fresh_ranges, ingredients = split_input(map_input(input_file))
+    ranges = parse_int_records(fresh_ranges, 2)
+    fresh_index = FreshRangeIndex(
+        *collapse_fresh_range_arrays(ranges[:, 0], ranges[:, 1])
+    )
+    del ranges
+
+    # The mapped ingredients are only parsed a chunk at a time, so the whole
+    # section is never held as integers. Every fresh ingredient is still kept,
+    # at 8 bytes each, until they are deduplicated at the end to match the
+    # set the other parser builds.
+    fresh_ingredients = array("q")
+    for chunk in split_blocks(ingredients, chunk_size):
+        chunk_ingredients = parse_ints(chunk)
+        fresh = chunk_ingredients[fresh_index.contains_all(chunk_ingredients)]
+        fresh_ingredients.frombytes(fresh.tobytes())
+    return fresh_index, np.unique(np.frombuffer(fresh_ingredients, dtype=np.int64))
+
+
+def load_with_set(input_file: str):
     fresh_ranges, available_ingredients = parse_input_file(input_file)
-    fresh_ingredients = find_fresh_ingredients(fresh_ranges, available_ingredients)
+    fresh_index = FreshRangeIndex.from_collapsed_ranges(
+        collapse_fresh_ranges(fresh_ranges)
+    )
+    ingredients = np.fromiter(
+        available_ingredients, dtype=np.int64, count=len(available_ingredients)
+    )
+    return fresh_index, ingredients[fresh_index.contains_all(ingredients)]
+
+
+def peak_memory(load, input_file: str) -> int:
+    tracemalloc.start()
+    try:
+        load(input_file)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def report_peak_memory(input_file: str):
+    # Load the file both ways, one after the other, so each peak only
+    # covers its own pipeline
+    stream_peak = peak_memory(stream_input_file, input_file)
+    set_peak = peak_memory(load_with_set, input_file)
+    mib = 1024 * 1024
+    print(f"Peak memory streaming: {stream_peak / mib:.1f} MiB")
+    print(f"Peak memory with a set: {set_peak / mib:.1f} MiB")
+    print(f"Streaming saves: {(set_peak - stream_peak) / mib:.1f} MiB")
+
+
+def main(
+    *,
+    input_file: str,
+    verbose: bool,
+    stream: bool = True,
+    report_memory: bool = False,
+    incremental: bool = False,
+):
+    if incremental:
+        fresh_ranges, ingredients = split_input(map_input(input_file))
+        fresh_range_set = FreshRangeSet()
+        for start, end in parse_fresh_ranges(fresh_ranges):
+            fresh_range_set.add(start, end)
+            if verbose:
+                print(
+                    f"Added {start}-{end}, num possible fresh ingredients: "
+                    f"{fresh_range_set.total_fresh_ids()}"
+                )
+        ingredients = parse_ints(ingredients)
+        fresh_index = fresh_range_set.to_index()
+        fresh_ingredients = np.unique(
+            ingredients[fresh_index.contains_all(ingredients)]
+        )
+    elif stream:
+        fresh_index, fresh_ingredients = stream_input_file(input_file)
+    else:
+        fresh_index, fresh_ingredients = load_with_set(input_file)
     if verbose:
-        print(f"Fresh ingredients: {list(sorted(fresh_ingredients))}")
+        print(f"Fresh ingredients: {sorted(fresh_ingredients.tolist())}")
     print(f"Num fresh ingredients: {len(fresh_ingredients)}")
 
-    collapsed_fresh_ranges = collapse_fresh_ranges(fresh_ranges)
     if verbose:
         print("Collapsed fresh ranges:")
-        for start, end in collapsed_fresh_ranges:
+        for start, end in fresh_index.ranges():
             print(f"{start}-{end}")
-    possible_fresh_ingredients = sum(
-        ((end - start) + 1) for start, end in collapsed_fresh_ranges
-    )
+    possible_fresh_ingredients = fresh_index.total_fresh_ids()
     print(f"Num possible fresh ingredients: {possible_fresh_ingredients}")
+    if report_memory:
+        report_peak_memory(input_file)
 
 
 if __name__ == "__main__":
@@ -86,6 +299,28 @@ if __name__ == "__main__":
     parser.add_argument(
         "--verbose", "-v", action="store_true", help="Print debug messages"
     )
+    parser.add_argument(
+        "--no-stream",
+        dest="stream",
+        action="store_false",
+        help="Load every ingredient into a set before checking them",
+    )
+    parser.add_argument(
+        "--report-memory",
+        action="store_true",
+        help="Print how much less peak memory streaming uses than a set",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Insert the fresh ranges one at a time into a mutable interval set",
+    )
     args = parser.parse_args()
 
-    main(input_file=args.input_file, verbose=args.verbose)
+    main(
+        input_file=args.input_file,
+        verbose=args.verbose,
+        stream=args.stream,
+        report_memory=args.report_memory,
+        incremental=args.incremental,
+    )
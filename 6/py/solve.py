@@ -7,6 +7,11 @@ import argparse
 from functools import reduce
 import operator
 
+import numpy as np
+
+# Number of problems to reduce at once when evaluating a whole worksheet
+BLOCK_SIZE = 4096
+
 SYMBOL_TO_OPERATOR = {
     "+": operator.add,
     "-": operator.sub,
@@ -32,59 +37,180 @@ def parse_input_file(input_file: str):
 
 
 def parse_input_file_columnwise(input_file: str):
+    with open(input_file, "rb") as file:
+        lines = file.read().splitlines()
+    # The operators are on the last row that isn't blank
+    while lines and not lines[-1].strip():
+        lines.pop()
+    num_rows = len(lines)
+    max_length = max((len(line) for line in lines), default=0)
+
+    # Pad lines to the same length and rotate the grid so that each column,
+    # read right to left, becomes a contiguous run of bytes
+    grid = np.frombuffer(
+        b"".join(line.ljust(max_length) for line in lines), dtype=np.uint8
+    ).reshape(num_rows, max_length)
+    rotated_grid = np.ascontiguousarray(grid[:, ::-1].T)
+    is_blank = (rotated_grid == ord(" ")).all(axis=1)
+    rotated_lines = rotated_grid.tobytes()
+
+    # Problems are separated by blank columns, with the operator on the
+    # bottom row of one of their columns
     problems = []
-    with open(input_file, "r") as file:
-        # Find longest line so that we know max column
-        max_length = max(len(line.rstrip("\n")) for line in file)
-        file.seek(0)
-
-        # Rotate file
-        rotated_lines = [""] * max_length
-        for line in file:
-            line = line.rstrip("\n")
-            length_diff = max_length - len(line)
-            if length_diff:
-                line += " " * length_diff
-            for i, char in enumerate(reversed(line)):
-                rotated_lines[i] += char
-
-        # Parse rotated lines
-        problem = []
-        for line in rotated_lines:
-            line = line.strip()
-            if not line:
-                continue
-            if line[-1].isnumeric():
-                problem.append(line)
-            else:
-                problem.append(line[:-1])
-                problem.append(line[-1])
-                problems.append(problem)
-                problem = []
+    problem = []
+    operator = None
+    for i in range(max_length + 1):
+        if i == max_length or is_blank[i]:
+            if problem or operator:
+                problems.append(problem + [operator])
+            problem = []
+            operator = None
+            continue
+        line = rotated_lines[i * num_rows : (i + 1) * num_rows]
+        if operand := line[:-1].strip():
+            problem.append(operand.decode())
+        if line[-1:].strip():
+            operator = line[-1:].decode()
 
     return problems
 
 
-def solve_problems(problems, verbose):
+def product_tree(operands: np.ndarray):
+    # Multiply neighboring operands pairwise until one is left, so the
+    # numbers being multiplied stay similar in size. Works down the first
+    # axis, so a 2-D array gives the product of each column.
+    while len(operands) > 1:
+        products = operands[0 : len(operands) - 1 : 2] * operands[1::2]
+        if len(operands) % 2:
+            products = np.concatenate((products, operands[-1:]))
+        operands = products
+    return operands[0]
+
+
+def reduce_modulo(operator: str, operands, modulus: int):
+    if operator == "/":
+        raise ValueError("Can't reduce division problems modulo a number")
+    return reduce(
+        lambda x, y: SYMBOL_TO_OPERATOR[operator](x, y) % modulus,
+        (operand % modulus for operand in operands),
+    )
+
+
+def reduce_operands(operator: str, operands: list[int], modulus: int | None = None):
+    if modulus:
+        return reduce_modulo(operator, operands, modulus)
+    if operator == "+":
+        return sum(operands)
+    if operator == "*":
+        return product_tree(np.array(operands, dtype=object))
+    return reduce(SYMBOL_TO_OPERATOR[operator], operands)
+
+
+def solve_problems(problems, verbose, modulus: int | None = None):
     answers = []
     for problem in problems:
         operator = problem[-1]
         operands = [int(x) for x in problem[:-1]]
-        answer = reduce(SYMBOL_TO_OPERATOR[operator], operands)
+        answer = reduce_operands(operator, operands, modulus)
         if verbose:
             print(f"{f' {operator} '.join(problem[:-1])} = {answer}")
         answers.append(answer)
     return answers
 
 
-def main(*, input_file: str, verbose: bool, col_numbers: bool):
-    problems = (
-        parse_input_file(input_file)
-        if not col_numbers
-        else parse_input_file_columnwise(input_file)
-    )
-    answers = solve_problems(problems, verbose)
-    print(f"Grand total: {sum(answers)}")
+def parse_worksheet(input_file: str) -> tuple[np.ndarray, np.ndarray]:
+    # The operators are on the last row, so no problem can be solved before
+    # the whole file has been read. Every row is parsed into one matrix of
+    # operands up front instead.
+    rows = []
+    operators = np.empty(0, dtype="U1")
+    with open(input_file, "r") as file:
+        for line in file:
+            entries = parse_line(line)
+            if not entries:
+                continue
+            if entries[0] in SYMBOL_TO_OPERATOR:
+                operators = np.array(entries)
+                continue
+            try:
+                rows.append(np.array(entries, dtype=np.int64))
+            except OverflowError:
+                # Too big for int64, so fall back to Python ints
+                rows.append(np.array([int(x) for x in entries], dtype=object))
+    numbers = np.vstack(rows) if rows else np.empty((0, len(operators)), np.int64)
+    return numbers, operators
+
+
+def reduce_columns(
+    operands: np.ndarray, operator: str, modulus: int | None = None
+) -> list:
+    if modulus:
+        # Reduce as Python ints when the modulus itself is too big for int64
+        if modulus > np.iinfo(np.int64).max:
+            operands = operands.astype(object)
+        operands = operands % modulus
+        # Keep int64 when products of two reduced operands can't overflow it
+        operands = operands.astype(np.int64 if modulus <= 2**31 else object)
+        return reduce_modulo(operator, operands, modulus).tolist()
+    if operator == "+":
+        fits = operands.dtype != object and (
+            len(operands) * int(np.abs(operands).max(initial=0)) < 2**63
+        )
+        return (operands if fits else operands.astype(object)).sum(axis=0).tolist()
+    if operator == "*":
+        answers = np.empty(operands.shape[1], dtype=object)
+        fits = np.zeros(operands.shape[1], dtype=bool)
+        if operands.dtype != object:
+            with np.errstate(divide="ignore"):
+                bits = np.log2(np.abs(operands).astype(np.float64)).sum(axis=0)
+            fits = bits < 62
+            answers[fits] = operands[:, fits].prod(axis=0).tolist()
+        answers[~fits] = product_tree(operands[:, ~fits].astype(object))
+        return answers.tolist()
+    # Other operators depend on operand order, so fold down each column
+    return [
+        reduce(SYMBOL_TO_OPERATOR[operator], column) for column in operands.T.tolist()
+    ]
+
+
+def solve_worksheet(
+    numbers: np.ndarray, operators: np.ndarray, modulus: int | None = None
+):
+    # Evaluate blocks of problems at a time, reducing every problem in the
+    # block that shares an operator together, and yield answers in order.
+    # This only bounds the size of each reduction, since the whole worksheet
+    # is already parsed.
+    for block_start in range(0, len(operators), BLOCK_SIZE):
+        block_operators = operators[block_start : block_start + BLOCK_SIZE]
+        block_numbers = numbers[:, block_start : block_start + BLOCK_SIZE]
+        answers = [None] * len(block_operators)
+        for operator in np.unique(block_operators).tolist():
+            problem_indices = np.flatnonzero(block_operators == operator)
+            for i, answer in zip(
+                problem_indices.tolist(),
+                reduce_columns(block_numbers[:, problem_indices], operator, modulus),
+            ):
+                answers[i] = answer
+        yield from answers
+
+
+def main(
+    *, input_file: str, verbose: bool, col_numbers: bool, modulus: int | None = None
+):
+    # Verbose output needs the operands of each problem as written
+    if not (col_numbers or verbose):
+        answers = solve_worksheet(*parse_worksheet(input_file), modulus=modulus)
+    else:
+        problems = (
+            parse_input_file(input_file)
+            if not col_numbers
+            else parse_input_file_columnwise(input_file)
+        )
+        answers = solve_problems(problems, verbose, modulus)
+    if modulus:
+        print(f"Grand total mod {modulus}: {sum(answers) % modulus}")
+    else:
+        print(f"Grand total: {sum(answers)}")
 
 
 if __name__ == "__main__":
@@ -101,6 +227,17 @@ if __name__ == "__main__":
     parser.add_argument(
         "--verbose", "-v", action="store_true", help="Print debug messages"
     )
+    parser.add_argument(
+        "--modulus",
+        "-m",
+        type=int,
+        help="Only compute the grand total modulo this number, as a checksum",
+    )
     args = parser.parse_args()
 
-    main(input_file=args.input_file, verbose=args.verbose, col_numbers=args.col_numbers)
+    main(
+        input_file=args.input_file,
+        verbose=args.verbose,
+        col_numbers=args.col_numbers,
+        modulus=args.modulus,
+    )
@@ -7,6 +7,16 @@ import argparse
 from collections import defaultdict
 from enum import StrEnum
 from dataclasses import dataclass
+from pathlib import Path
+import sys
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # See common/__init__.py
+from common.inputs import find, map_input, read_grid, split_lines  # noqa: E402
+
+# Rows of the grid to look for splitters in at once
+ROW_BLOCK_SIZE = 1024
 
 
 class StateEnum(StrEnum):
@@ -31,9 +41,8 @@ def parse_line(line: str):
 
 def parse_input_file(input_file: str):
     rows = []
-    with open(input_file, "r") as file:
-        for line in file:
-            rows.append(parse_line(line))
+    for line in split_lines(map_input(input_file)):
+        rows.append(parse_line(str(line, "ascii")))
     return rows
 
 
@@ -55,16 +64,20 @@ def shoot_beam(rows, verbose):
         raise ValueError(f"Failed to find start in row 0: {rows[0]}")
     beams = {start: 1}
     split_count = 0
+    # Beams split off either edge wrap around to the other one
+    width = len(rows[0])
     for row_num, row in enumerate(rows):
         if row_num == 0:
             continue
         new_beams = defaultdict(int)
+        # Find the split beams before marking any, since marking a beam can
+        # cover a neighboring splitter that another beam still has to hit
+        split_beams = {beam for beam in beams if row[beam].state == StateEnum.SPLIT}
         for beam, path_count in beams.items():
-            if row[beam].state == StateEnum.SPLIT:
-                row[beam - 1].state = StateEnum.BEAM
-                row[beam + 1].state = StateEnum.BEAM
-                new_beams[beam - 1] += path_count
-                new_beams[beam + 1] += path_count
+            if beam in split_beams:
+                for new_beam in ((beam - 1) % width, (beam + 1) % width):
+                    row[new_beam].state = StateEnum.BEAM
+                    new_beams[new_beam] += path_count
                 split_count += 1
             else:
                 row[beam].state = StateEnum.BEAM
@@ -86,12 +99,86 @@ def shoot_beam(rows, verbose):
     return split_count, sum(beams.values())
 
 
-def main(*, input_file: str, verbose: bool):
-    rows = parse_input_file(input_file)
+def find_all(row: bytes, char: bytes):
+    i = row.find(char)
+    while i != -1:
+        yield i
+        i = row.find(char, i + 1)
+
+
+def shoot_beam_streaming(input_file: str):
+    # Only the path count of the beam in each column is kept, and rows are
+    # read one at a time, so memory only grows with the width of the grid
+    with open(input_file, "rb") as file:
+        first_row = file.readline()
+        start = first_row.find(StateEnum.START.encode())
+        if start == -1:
+            raise ValueError(f"Failed to find start in row 0: {first_row!r}")
+        width = len(first_row.rstrip())
+        beams = [0] * width
+        beams[start] = 1
+        split_count = 0
+        split = StateEnum.SPLIT.encode()
+        for row in file:
+            # Like the other engines, only the first row's width counts
+            hit_splitters = [
+                (column, beams[column])
+                for column in find_all(row[:width], split)
+                if beams[column]
+            ]
+            # Clear every split beam before adding the new ones, so that a
+            # beam sent onto a neighboring splitter is not split again in
+            # the same row
+            for column, _ in hit_splitters:
+                beams[column] = 0
+            for column, path_count in hit_splitters:
+                beams[(column - 1) % width] += path_count
+                beams[(column + 1) % width] += path_count
+            split_count += len(hit_splitters)
+    return split_count, sum(beams)
+
+
+def shoot_beam_vectorized(input_file: str):
+    data = map_input(input_file)
+    first_row_end = find(data, b"\n")
+    first_row = bytes(data[: first_row_end if first_row_end != -1 else len(data)])
+    start = first_row.find(StateEnum.START.encode())
+    if start == -1:
+        raise ValueError(f"Failed to find start in row 0: {first_row!r}")
+    # Every row is cut or padded to the width of the first one
+    width = len(first_row.rstrip())
+    grid = read_grid(data, fill=b".")[:, :width]
+    beams = np.zeros(width, dtype=np.int64)
+    beams[start] = 1
+    split_count = 0
+    split = ord(StateEnum.SPLIT)
+    for block_start in range(1, len(grid), ROW_BLOCK_SIZE):
+        block = grid[block_start : block_start + ROW_BLOCK_SIZE] == split
+        for splitters in block[block.any(axis=1)]:
+            split_beams = np.where(splitters, beams, 0)
+            split_count += int(np.count_nonzero(split_beams))
+            # A column can at most get its own beam plus both neighbors' split
+            # beams, so switch to Python ints before that could overflow
+            if beams.dtype != object and int(beams.max()) > (2**63 - 1) // 3:
+                beams = beams.astype(object)
+                split_beams = split_beams.astype(object)
+            beams -= split_beams
+            # Beams split off either edge wrap around to the other one
+            beams += np.roll(split_beams, -1) + np.roll(split_beams, 1)
+    return split_count, int(beams.sum())
+
+
+def main(*, input_file: str, verbose: bool, backend: str = "numpy"):
+    # The full grid is only needed to print it
     if verbose:
+        rows = parse_input_file(input_file)
         print_rows(rows)
         print()
-    split_count, quantum_count = shoot_beam(rows, verbose)
+        split_count, quantum_count = shoot_beam(rows, verbose)
+    elif backend == "numpy":
+        split_count, quantum_count = shoot_beam_vectorized(input_file)
+    else:
+        split_count, quantum_count = shoot_beam_streaming(input_file)
     print(f"Split count: {split_count}")
     print(f"Quantum count: {quantum_count}")
 
@@ -104,6 +191,12 @@ if __name__ == "__main__":
     parser.add_argument(
         "--verbose", "-v", action="store_true", help="Print debug messages"
     )
+    parser.add_argument(
+        "--backend",
+        choices=("numpy", "lists"),
+        default="numpy",
+        help="Keep beam path counts in a NumPy array or a plain list",
+    )
     args = parser.parse_args()
 
-    main(input_file=args.input_file, verbose=args.verbose)
+    main(input_file=args.input_file, verbose=args.verbose, backend=args.backend)
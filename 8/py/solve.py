@@ -4,18 +4,27 @@ author: Dan Blanchard
 """
 
 import argparse
+from array import array
+from collections import Counter
 import itertools
-from math import sqrt, prod
+from math import ceil, sqrt, prod
 from operator import itemgetter
+from pathlib import Path
+import sys
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # See common/__init__.py
+from common.inputs import map_input, parse_int_records  # noqa: E402
 
 
 class JunctionBox:
+    __slots__ = ("x", "y", "z")
+
     def __init__(self, x: int, y: int, z: int):
         self.x = x
         self.y = y
         self.z = z
-        self.circuit = {self}
-        self.connections = {self}
 
     def distance_from(self, other):
         return sqrt(
@@ -24,15 +33,6 @@ class JunctionBox:
             + ((self.z - other.z) ** 2)
         )
 
-    def connect(self, other):
-        # Update circuits
-        self.circuit.update(other.circuit)
-        for box in self.circuit:
-            box.circuit = self.circuit
-        # Update direct connections
-        self.connections.add(other)
-        other.connections.add(self)
-
     def __eq__(self, other: "JunctionBox") -> bool:
         return self.x == other.x and self.y == other.y and self.z == other.z
 
@@ -43,67 +43,320 @@ class JunctionBox:
         return f"({self.x}, {self.y}, {self.z})"
 
 
-def connect_closest_boxes(boxes, iterations: int, verbose):
-    box_distances = {
-        (box1, box2): box1.distance_from(box2)
-        for box1, box2 in itertools.combinations(boxes, 2)
-    }
-    closest_boxes = sorted(box_distances.items(), key=itemgetter(1))
+class Circuits:
+    # Disjoint sets of box indices, with union by size and path compression
+    def __init__(self, num_boxes: int):
+        self.parents = array("l", range(num_boxes))
+        self.sizes = array("l", [1]) * num_boxes
+        self.num_circuits = num_boxes
+        # How many circuits there are of each size
+        self.size_counts = Counter({1: num_boxes}) if num_boxes else Counter()
+
+    def find(self, box: int) -> int:
+        root = box
+        while self.parents[root] != root:
+            root = self.parents[root]
+        while self.parents[box] != root:
+            self.parents[box], box = root, self.parents[box]
+        return root
+
+    def connect(self, box1: int, box2: int) -> bool:
+        root1 = self.find(box1)
+        root2 = self.find(box2)
+        if root1 == root2:
+            return False
+        if self.sizes[root1] < self.sizes[root2]:
+            root1, root2 = root2, root1
+        for root in (root1, root2):
+            self.size_counts[self.sizes[root]] -= 1
+            if not self.size_counts[self.sizes[root]]:
+                del self.size_counts[self.sizes[root]]
+        self.parents[root2] = root1
+        self.sizes[root1] += self.sizes[root2]
+        self.size_counts[self.sizes[root1]] += 1
+        self.num_circuits -= 1
+        return True
+
+    def largest_sizes(self, count: int = 3) -> list[int]:
+        largest = []
+        for size in sorted(self.size_counts, reverse=True):
+            largest.extend([size] * min(self.size_counts[size], count - len(largest)))
+            if len(largest) == count:
+                break
+        return largest
+
+
+def sorted_box_pairs(boxes):
+    box_distances = [
+        ((box1, box2), boxes[box1].distance_from(boxes[box2]))
+        for box1, box2 in itertools.combinations(range(len(boxes)), 2)
+    ]
+    return sorted(box_distances, key=itemgetter(1))
+
+
+def expand_ranges(starts: np.ndarray, ends: np.ndarray):
+    # For each i, every value in range(starts[i], ends[i]), along with the
+    # index i it came from
+    lengths = np.maximum(ends - starts, 0)
+    sources = np.repeat(np.arange(len(starts)), lengths)
+    offsets = np.arange(lengths.sum()) - np.repeat(
+        np.cumsum(lengths) - lengths, lengths
+    )
+    return sources, starts[sources] + offsets
+
+
+def grid_cell_size(extents: np.ndarray, num_boxes: int, points_per_cell: int) -> float:
+    # Cubes sized to give about one cell per points_per_cell boxes, spread over
+    # only the axes the boxes span more than one cell of, so flat or
+    # elongated inputs don't get millions of cells along their long axis
+    spans = sorted(extents.tolist(), reverse=True)
+    num_cells = max(1.0, num_boxes / points_per_cell)
+    for num_axes in (3, 2, 1):
+        shortest_span = spans[num_axes - 1]
+        cell_size = (prod(spans[:num_axes]) / num_cells) ** (1 / num_axes)
+        if 0 < cell_size <= shortest_span:
+            return max(1.0, cell_size)
+    return 1.0
+
+
+def nearby_box_pairs(boxes, points_per_cell: int = 2):
+    # Bucket boxes into a uniform grid of cubes, then yield pairs one shell
+    # of distances at a time, only comparing boxes in cells close enough to
+    # hold pairs within that shell
+    coords = np.array([(box.x, box.y, box.z) for box in boxes], dtype=np.int64)
+    if len(coords) < 2:
+        return
+    low = coords.min(axis=0)
+    extents = coords.max(axis=0) - low
+    cell_size = grid_cell_size(extents, len(coords), points_per_cell)
+    num_cells = (extents // cell_size).astype(np.int64) + 1
+    cell_coords = ((coords - low) // cell_size).astype(np.int64)
+    cell_ids = np.ravel_multi_index(cell_coords.T, num_cells)
+
+    # Sort boxes by cell so each cell is a contiguous run of box indices
+    order = np.argsort(cell_ids, kind="stable")
+    sorted_cell_coords = cell_coords[order]
+    cell_starts = np.searchsorted(cell_ids[order], np.arange(np.prod(num_cells) + 1))
+
+    def pairs_at_offset(offset):
+        neighbor_cells = sorted_cell_coords + offset
+        in_grid = np.all((neighbor_cells >= 0) & (neighbor_cells < num_cells), axis=1)
+        firsts = np.flatnonzero(in_grid)
+        neighbor_ids = np.ravel_multi_index(neighbor_cells[firsts].T, num_cells)
+        starts = cell_starts[neighbor_ids]
+        if not any(offset):
+            # Within a cell, only pair each box with the boxes after it
+            starts = np.maximum(starts, firsts + 1)
+        sources, seconds = expand_ranges(starts, cell_starts[neighbor_ids + 1])
+        return firsts[sources], seconds
+
+    # Offsets to every other cell, keeping only one of each offset and its
+    # negation so that each pair of cells is only compared once
+    offsets = np.stack(
+        np.meshgrid(
+            *(np.arange(1 - cells, cells) for cells in num_cells), indexing="ij"
+        ),
+        axis=-1,
+    ).reshape(-1, 3)
+    dx, dy, dz = offsets.T
+    offsets = offsets[(dx > 0) | ((dx == 0) & ((dy > 0) | ((dy == 0) & (dz >= 0))))]
+    # Closest and furthest any boxes in cells at each offset could be, with
+    # a little slack for rounding when assigning boxes to cells
+    abs_offsets = np.abs(offsets)
+    min_distances = (
+        cell_size * np.sqrt((np.maximum(abs_offsets - 1, 0) ** 2).sum(axis=1)) - 1
+    )
+    max_distances = cell_size * np.sqrt(((abs_offsets + 1) ** 2).sum(axis=1)) + 1
+    max_distance = sqrt(float((extents**2).sum()))
+
+    # Shell s holds the pairs further than (s - 1) * cell_size and no further
+    # than s * cell_size, so each offset only matters for a few shells. List
+    # those once, grouped by shell, so shells with no offsets are skipped.
+    last_shell = ceil(max_distance / cell_size) + 1
+    first_shells = np.maximum(np.ceil(min_distances / cell_size), 1).astype(np.int64)
+    last_shells = np.minimum(np.ceil(max_distances / cell_size), last_shell)
+    offset_indices, offset_shells = expand_ranges(
+        first_shells, last_shells.astype(np.int64) + 1
+    )
+    shell_order = np.argsort(offset_shells, kind="stable")
+    offset_indices = offset_indices[shell_order]
+    shells, shell_starts = np.unique(offset_shells[shell_order], return_index=True)
+    shell_ends = np.append(shell_starts[1:], len(offset_indices))
+
+    for shell, shell_start, shell_end in zip(
+        shells.tolist(), shell_starts.tolist(), shell_ends.tolist()
+    ):
+        inner_radius = (shell - 1) * cell_size
+        outer_radius = shell * cell_size
+        shell_offsets = offsets[offset_indices[shell_start:shell_end]]
+        firsts = []
+        seconds = []
+        for offset in shell_offsets:
+            offset_firsts, offset_seconds = pairs_at_offset(offset)
+            firsts.append(offset_firsts)
+            seconds.append(offset_seconds)
+        firsts = order[np.concatenate(firsts)]
+        seconds = order[np.concatenate(seconds)]
+        squared_distances = ((coords[firsts] - coords[seconds]) ** 2).sum(axis=1)
+        # The first shell also holds boxes at the same spot
+        in_shell = (squared_distances <= outer_radius**2) & (
+            (shell == 1) | (squared_distances > inner_radius**2)
+        )
+        # Order each pair and break distance ties the same way as sorting the
+        # pairs from itertools.combinations does
+        box1_indices = np.minimum(firsts, seconds)[in_shell]
+        box2_indices = np.maximum(firsts, seconds)[in_shell]
+        squared_distances = squared_distances[in_shell]
+        pair_order = np.lexsort((box2_indices, box1_indices, squared_distances))
+        for box1_index, box2_index, squared_distance in zip(
+            box1_indices[pair_order].tolist(),
+            box2_indices[pair_order].tolist(),
+            squared_distances[pair_order].tolist(),
+        ):
+            yield (box1_index, box2_index), sqrt(squared_distance)
+
+
+def connect_closest_boxes(
+    boxes, iterations: int, verbose, spatial_index=False
+) -> Circuits:
+    closest_boxes = (
+        nearby_box_pairs(boxes) if spatial_index else sorted_box_pairs(boxes)
+    )
+    circuits = Circuits(len(boxes))
     for i, ((box1, box2), distance) in enumerate(closest_boxes):
         if iterations and i > iterations:
             break
+        connected = circuits.connect(box1, box2)
         if verbose:
-            print(f"Connected {box1} to {box2} with distance {distance}")
-            if box1.circuit == box2.circuit:
+            print(f"Connected {boxes[box1]} to {boxes[box2]} with distance {distance}")
+            if not connected:
                 print("...but they were already in the same circuit")
-        box1.connect(box2)
-        if len(box1.circuit) == len(boxes):
-            print(f"Final connection made between {box1} and {box2}")
-            print(f"Product of X of those boxes = {box1.x * box2.x}")
+        if circuits.num_circuits == 1:
+            print(f"Final connection made between {boxes[box1]} and {boxes[box2]}")
+            print(f"Product of X of those boxes = {boxes[box1].x * boxes[box2].x}")
             break
+    return circuits
 
 
-def find_circuits(boxes):
-    circuits: list[set[JunctionBox]] = []
-    seen_boxes = set()
-    for box in boxes:
-        if box in seen_boxes:
-            continue
-        circuits.append(box.circuit)
-        seen_boxes.update(box.circuit)
-    return circuits
+def earlier_pairs(
+    box1: np.ndarray, box2: np.ndarray, other1: np.ndarray, other2: np.ndarray
+) -> np.ndarray:
+    # Whether each pair box1-box2 comes before other1-other2 in the order
+    # itertools.combinations lists them
+    low, high = np.minimum(box1, box2), np.maximum(box1, box2)
+    other_low, other_high = np.minimum(other1, other2), np.maximum(other1, other2)
+    return (low < other_low) | ((low == other_low) & (high < other_high))
+
+
+def find_final_connection(boxes) -> tuple[int, int]:
+    # The final connection is the longest edge of the minimum spanning tree,
+    # which Prim's algorithm finds while only keeping each box's distance to
+    # the closest box already in the tree. Breaking every distance tie by box
+    # order, the way sorting every pair does, makes that tree the one sorting
+    # builds, so its longest edge is the same final connection.
+    if len(boxes) < 2:
+        raise ValueError("Need at least two boxes to connect")
+    # Boxes not yet in the tree are kept at the front of these arrays, so
+    # each step only has to look at those
+    remaining = len(boxes)
+    box_ids = np.arange(remaining)
+    xs, ys, zs = (
+        np.array([getattr(box, axis) for box in boxes], dtype=np.int64)
+        for axis in ("x", "y", "z")
+    )
+    best_distances = np.full(remaining, np.iinfo(np.int64).max, dtype=np.int64)
+    closest_boxes = np.zeros(remaining, dtype=np.int64)
+    squared_distances = np.empty(remaining, dtype=np.int64)
+    deltas = np.empty(remaining, dtype=np.int64)
+    longest = (-1, 0, 0)
+    i = 0
+    while remaining > 1:
+        # Move the box joining the tree out of the remaining boxes
+        remaining -= 1
+        box = int(box_ids[i])
+        x, y, z = int(xs[i]), int(ys[i]), int(zs[i])
+        for values in (box_ids, xs, ys, zs, best_distances, closest_boxes):
+            values[i] = values[remaining]
+
+        distances = squared_distances[:remaining]
+        delta = deltas[:remaining]
+        np.subtract(xs[:remaining], x, out=delta)
+        np.multiply(delta, delta, out=distances)
+        for values, value in ((ys, y), (zs, z)):
+            np.subtract(values[:remaining], value, out=delta)
+            delta *= delta
+            distances += delta
+        closer = distances < best_distances[:remaining]
+        if (ties := np.flatnonzero(distances == best_distances[:remaining])).size:
+            closer[ties] = earlier_pairs(
+                box, box_ids[ties], closest_boxes[ties], box_ids[ties]
+            )
+        best_distances[:remaining][closer] = distances[closer]
+        closest_boxes[:remaining][closer] = box
+
+        # The next box is the one with the shortest edge to the tree, and the
+        # earliest pair among edges just as short
+        i = int(np.argmin(best_distances[:remaining]))
+        candidates = np.flatnonzero(best_distances[:remaining] == best_distances[i])
+        if len(candidates) > 1:
+            candidate_boxes = box_ids[candidates]
+            candidate_others = closest_boxes[candidates]
+            lows = np.minimum(candidate_boxes, candidate_others)
+            highs = np.maximum(candidate_boxes, candidate_others)
+            i = int(candidates[np.lexsort((highs, lows))[0]])
+        next_box = int(box_ids[i])
+        other = int(closest_boxes[i])
+        longest = max(
+            longest,
+            (int(best_distances[i]), min(next_box, other), max(next_box, other)),
+        )
+    _, box1, box2 = longest
+    return box1, box2
 
 
-def parse_line(line: str):
-    return JunctionBox(*[int(i) for i in line.strip().split(",")])
+def find_circuits(boxes, circuits: Circuits):
+    # Group boxes by circuit, in order of each circuit's first box
+    circuit_boxes: dict[int, list[JunctionBox]] = {}
+    for i, box in enumerate(boxes):
+        circuit_boxes.setdefault(circuits.find(i), []).append(box)
+    return list(circuit_boxes.values())
 
 
 def parse_input_file(input_file: str):
-    boxes = list()
-    with open(input_file, "r") as file:
-        for line in file:
-            boxes.append(parse_line(line))
-    return boxes
+    return [
+        JunctionBox(x, y, z)
+        for x, y, z in parse_int_records(map_input(input_file), 3).tolist()
+    ]
 
 
-def main(*, input_file: str, verbose: bool, n: int):
+def main(
+    *,
+    input_file: str,
+    verbose: bool,
+    n: int,
+    spatial_index: bool = False,
+    mst: bool = False,
+):
     boxes = parse_input_file(input_file)
+    if mst:
+        box1, box2 = find_final_connection(boxes)
+        print(f"Final connection made between {boxes[box1]} and {boxes[box2]}")
+        print(f"Product of X of those boxes = {boxes[box1].x * boxes[box2].x}")
+        return
     if verbose:
         for box in boxes:
             print(str(box))
-    connect_closest_boxes(boxes, n, verbose)
-    # if verbose:
-    #     print(boxes)
-    circuits = find_circuits(boxes)
+    circuits = connect_closest_boxes(boxes, n, verbose, spatial_index=spatial_index)
+    circuit_boxes = find_circuits(boxes, circuits)
     if verbose:
-        for i, circuit in enumerate(circuits):
+        for i, circuit in enumerate(circuit_boxes):
             print(f"Circuit {i}:")
             for box in circuit:
                 print(f"  {box}")
-    print(f"Num circuits: {len(circuits)}")
-    circuit_sizes = [len(circuit) for circuit in circuits]
+    print(f"Num circuits: {circuits.num_circuits}")
+    circuit_sizes = [len(circuit) for circuit in circuit_boxes]
     print(f"Circuit sizes: {circuit_sizes}")
-    largest_sizes = sorted(circuit_sizes, reverse=True)[:3]
+    largest_sizes = circuits.largest_sizes(3)
     print(
         f"Largest three product: {' x '.join(str(x) for x in largest_sizes)} = {prod(largest_sizes)}"
     )
@@ -118,6 +371,25 @@ if __name__ == "__main__":
     parser.add_argument(
         "--verbose", "-v", action="store_true", help="Print debug messages"
     )
+    parser.add_argument(
+        "--spatial-index",
+        "-s",
+        action="store_true",
+        help="Find close pairs with a grid of cells instead of sorting every pair",
+    )
+    parser.add_argument(
+        "--mst",
+        action="store_true",
+        help="Only find the final connection, using a minimum spanning tree",
+    )
     args = parser.parse_args()
+    if args.mst and args.n:
+        parser.error("--mst finds the final connection, so it can't be used with -n")
 
-    main(input_file=args.input_file, verbose=args.verbose, n=args.n)
+    main(
+        input_file=args.input_file,
+        verbose=args.verbose,
+        n=args.n,
+        spatial_index=args.spatial_index,
+        mst=args.mst,
+    )
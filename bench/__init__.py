@@ -0,0 +1,4 @@
+"""Advent of Code 2025 Benchmarks
+
+author: Dan Blanchard
+"""
@@ -0,0 +1,155 @@
+"""Advent of Code 2025 Benchmarks
+
+author: Dan Blanchard
+"""
+
+import argparse
+import json
+from pathlib import Path
+import sys
+import tempfile
+
+from .suite import CASES, find_regressions, run_case, scaling_exponents
+
+
+def main(
+    *,
+    cases: list[str] | None,
+    steps: int,
+    seed: int,
+    repeat: int,
+    measure_memory: bool,
+    input_dir: str | None,
+    baseline_file: str | None,
+    save_baseline: str | None,
+    time_tolerance: float,
+    memory_tolerance: float,
+) -> int:
+    selected_cases = [case for case in CASES if not cases or case.name in cases]
+    results = {}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        input_path = Path(input_dir or temp_dir)
+        input_path.mkdir(parents=True, exist_ok=True)
+        print(
+            f"{'case':<14} {'size':>8} {'seconds':>9} {'peak MiB':>9} {'exponent':>8}"
+        )
+        for case in selected_cases:
+            case_results = []
+            for size in case.sizes(steps):
+                case_results.append(
+                    run_case(case, size, input_path, seed, repeat, measure_memory)
+                )
+                exponent = scaling_exponents(case_results)[-1]
+                result = case_results[-1]
+                peak_memory = (
+                    f"{result['peak_memory'] / (1024 * 1024):.1f}"
+                    if result["peak_memory"] is not None
+                    else "-"
+                )
+                print(
+                    f"{case.name:<14} {size:>8} {result['seconds']:>9.3f} "
+                    f"{peak_memory:>9} "
+                    f"{f'{exponent:.2f}' if exponent is not None else '-':>8}",
+                    flush=True,
+                )
+            results[case.name] = case_results
+
+    if save_baseline:
+        with open(save_baseline, "w") as file:
+            json.dump({"seed": seed, "results": results}, file, indent=2)
+    if baseline_file:
+        with open(baseline_file, "r") as file:
+            baseline = json.load(file)
+        if baseline.get("seed") != seed:
+            print(f"Baseline was generated with seed {baseline.get('seed')}")
+            return 1
+        regressions = find_regressions(
+            results, baseline["results"], time_tolerance, memory_tolerance
+        )
+        if regressions:
+            print("Regressions:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print("No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Time every day's solver on generated inputs of growing size."
+    )
+    parser.add_argument(
+        "cases",
+        nargs="*",
+        help=f"Cases to run (default: all). Choices: {', '.join(c.name for c in CASES)}",
+    )
+    parser.add_argument(
+        "--steps",
+        type=int,
+        default=4,
+        help="Number of sizes to run each case at, doubling each time",
+    )
+    parser.add_argument(
+        "--seed", type=int, default=0, help="Seed for the generated inputs"
+    )
+    parser.add_argument(
+        "--repeat",
+        "-r",
+        type=int,
+        default=1,
+        help="Times to run each size, keeping the fastest",
+    )
+    parser.add_argument(
+        "--no-memory",
+        dest="measure_memory",
+        action="store_false",
+        help="Skip the extra traced run that measures peak memory",
+    )
+    parser.add_argument(
+        "--input-dir",
+        type=str,
+        help="Keep the generated inputs in this directory instead of a temporary one",
+    )
+    parser.add_argument(
+        "--baseline",
+        dest="baseline_file",
+        type=str,
+        help="Baseline JSON to compare against, exiting with 1 on regressions",
+    )
+    parser.add_argument(
+        "--save-baseline",
+        type=str,
+        help="Write the results to this JSON file for later comparisons",
+    )
+    parser.add_argument(
+        "--time-tolerance",
+        type=float,
+        default=0.5,
+        help="Fraction slower than the baseline that counts as a regression",
+    )
+    parser.add_argument(
+        "--memory-tolerance",
+        type=float,
+        default=0.1,
+        help="Fraction more peak memory than the baseline that counts as a regression",
+    )
+    args = parser.parse_args()
+    unknown_cases = set(args.cases) - {case.name for case in CASES}
+    if unknown_cases:
+        parser.error(f"Unknown cases: {', '.join(sorted(unknown_cases))}")
+
+    sys.exit(
+        main(
+            cases=args.cases,
+            steps=args.steps,
+            seed=args.seed,
+            repeat=args.repeat,
+            measure_memory=args.measure_memory,
+            input_dir=args.input_dir,
+            baseline_file=args.baseline_file,
+            save_baseline=args.save_baseline,
+            time_tolerance=args.time_tolerance,
+            memory_tolerance=args.memory_tolerance,
+        )
+    )
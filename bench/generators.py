@@ -0,0 +1,109 @@
+"""Advent of Code 2025 Synthetic Inputs
+
+author: Dan Blanchard
+"""
+
+import random
+
+
+def generate_rotations(size: int, rng: random.Random) -> str:
+    # size rotation lines, like day 1
+    return "".join(f"{rng.choice('LR')}{rng.randint(1, 999)}\n" for _ in range(size))
+
+
+def generate_id_ranges(size: int, rng: random.Random) -> str:
+    # size comma-separated ID ranges on one line, like day 2
+    ranges = []
+    for _ in range(size):
+        num_digits = rng.randint(1, 10)
+        start = rng.randint(10 ** (num_digits - 1), 10**num_digits - 1)
+        end = start + rng.randint(0, 10 ** min(num_digits - 1, 5))
+        ranges.append(f"{start}-{end}")
+    return ",".join(ranges) + "\n"
+
+
+def generate_battery_banks(size: int, rng: random.Random) -> str:
+    # size banks of 100 batteries, like day 3
+    return "".join("".join(rng.choices("123456789", k=100)) + "\n" for _ in range(size))
+
+
+def generate_roll_grid(size: int, rng: random.Random) -> str:
+    # size x size grid with about as many rolls as day 4
+    return "".join(
+        "".join("@" if rng.random() < 0.65 else "." for _ in range(size)) + "\n"
+        for _ in range(size)
+    )
+
+
+def generate_fresh_ranges(size: int, rng: random.Random) -> str:
+    # size fresh ranges and 5 * size ingredients, like day 5
+    max_id = 560_000_000_000_000
+    lines = []
+    for _ in range(size):
+        start = rng.randint(1, max_id)
+        lines.append(f"{start}-{start + rng.randint(0, 7_000_000_000_000)}\n")
+    lines.append("\n")
+    lines.extend(f"{rng.randint(1, max_id)}\n" for _ in range(5 * size))
+    return "".join(lines)
+
+
+def generate_worksheet(size: int, rng: random.Random) -> str:
+    # size problems of four operands each, like day 6. Each problem is as
+    # wide as its longest operand, and its operands are all aligned either
+    # left or right. Longer operands come first so that reading columns
+    # never finds a gap between digits, which the puzzle inputs avoid too.
+    rows = [[] for _ in range(5)]
+    for _ in range(size):
+        operands = sorted(
+            (str(rng.randint(1, 10 ** rng.randint(1, 4) - 1)) for _ in range(4)),
+            key=len,
+            reverse=True,
+        )
+        width = max(len(operand) for operand in operands)
+        align = str.ljust if rng.random() < 0.5 else str.rjust
+        for row, operand in zip(rows, operands):
+            row.append(align(operand, width))
+        rows[-1].append(rng.choice("+*").ljust(width))
+    return "".join(" ".join(row) + "\n" for row in rows)
+
+
+def generate_manifold(size: int, rng: random.Random) -> str:
+    # size rows of size columns, with the source in the middle of the top row
+    # and splitters on every other row after it, like day 7. Splitters are
+    # never next to each other, which the puzzle inputs never do either.
+    width = size | 1
+    rows = ["".join("S" if col == width // 2 else "." for col in range(width))]
+    for row in range(1, size):
+        cells = ["."] * width
+        if row % 2 == 0:
+            for col in range(1, width - 1):
+                if cells[col - 1] != "^" and rng.random() < 0.1:
+                    cells[col] = "^"
+        rows.append("".join(cells))
+    return "".join(row + "\n" for row in rows)
+
+
+def generate_junction_boxes(size: int, rng: random.Random) -> str:
+    # size junction box coordinates, like day 8
+    return "".join(
+        f"{rng.randint(0, 99_999)},{rng.randint(0, 99_999)},{rng.randint(0, 99_999)}\n"
+        for _ in range(size)
+    )
+
+
+GENERATORS = {
+    1: generate_rotations,
+    2: generate_id_ranges,
+    3: generate_battery_banks,
+    4: generate_roll_grid,
+    5: generate_fresh_ranges,
+    6: generate_worksheet,
+    7: generate_manifold,
+    8: generate_junction_boxes,
+}
+
+
+def generate_input(day: int, size: int, seed: int = 0) -> str:
+    # Seeded per day and size, so every size of every day is reproducible
+    # on its own
+    return GENERATORS[day](size, random.Random(f"{seed}-{day}-{size}"))
@@ -0,0 +1,158 @@
+"""Advent of Code 2025 Benchmark Suite
+
+author: Dan Blanchard
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from dataclasses import dataclass, field
+import io
+from math import log
+import multiprocessing
+import os
+from pathlib import Path
+import time
+import tracemalloc
+
+from runner import find_day_scripts, load_day
+
+from .generators import generate_input
+
+
+@dataclass(frozen=True)
+class Case:
+    name: str
+    day: int
+    # Smallest size to generate, which gets doubled for each later step
+    base_size: int
+    params: dict = field(default_factory=dict)
+
+    @property
+    def script(self) -> Path:
+        return find_day_scripts()[self.day]
+
+    def sizes(self, steps: int) -> list[int]:
+        return [self.base_size << step for step in range(steps)]
+
+
+# Base sizes are picked so that even the smallest step takes long enough to
+# time, and the largest default step is still quick to run
+CASES = [
+    Case("1", 1, 20_000),
+    Case("2", 2, 1_000),
+    Case("3", 3, 1_000, {"n": [2, 12]}),
+    Case("4", 4, 128),
+    Case("4-lists", 4, 128, {"backend": "lists"}),
+    Case("5", 5, 1_000),
+    Case("5-incremental", 5, 1_000, {"incremental": True}),
+    Case("6", 6, 2_000, {"col_numbers": False}),
+    Case("6-columns", 6, 2_000, {"col_numbers": True}),
+    Case("7", 7, 512),
+    Case("7-lists", 7, 512, {"backend": "lists"}),
+    Case("8", 8, 250, {"n": 1000}),
+    Case("8-spatial", 8, 1_000, {"n": 1000, "spatial_index": True}),
+    Case("8-mst", 8, 1_000, {"n": None, "mst": True}),
+]
+
+# Timings this far apart can be noise, whatever the tolerance says
+MIN_SECONDS_REGRESSION = 0.01
+
+
+def run_solver(script: Path, input_file: str, params: dict, measure_memory: bool):
+    # Runs in its own process, so that nothing cached by an earlier run is
+    # left around to make this one look faster
+    solver = load_day(script)
+    with redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        solver.main(input_file=input_file, verbose=False, **params)
+        seconds = time.perf_counter() - start
+        peak_memory = None
+        # Tracing slows everything down, so memory gets its own run
+        if measure_memory:
+            tracemalloc.start()
+            solver.main(input_file=input_file, verbose=False, **params)
+            _, peak_memory = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+    return seconds, peak_memory
+
+
+def run_case(
+    case: Case,
+    size: int,
+    input_dir: Path,
+    seed: int = 0,
+    repeat: int = 1,
+    measure_memory: bool = True,
+) -> dict:
+    input_file = input_dir / f"day{case.day}-{seed}-{size}.txt"
+    if not input_file.exists():
+        input_file.write_text(generate_input(case.day, size, seed))
+    times = []
+    peak_memory = None
+    context = multiprocessing.get_context("spawn")
+    for i in range(repeat):
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            seconds, run_memory = executor.submit(
+                run_solver,
+                case.script,
+                str(input_file),
+                case.params,
+                measure_memory and i == 0,
+            ).result()
+        times.append(seconds)
+        peak_memory = run_memory if i == 0 else peak_memory
+    return {
+        "size": size,
+        "input_bytes": os.path.getsize(input_file),
+        # The fastest run is the least affected by anything else on the box
+        "seconds": min(times),
+        "peak_memory": peak_memory,
+    }
+
+
+def scaling_exponents(results: list[dict]) -> list[float | None]:
+    # Slope of time against size on a log-log plot between consecutive
+    # sizes, so 1 is linear and 2 is quadratic
+    exponents = [None]
+    for previous, current in zip(results, results[1:]):
+        if previous["seconds"] > 0 and current["seconds"] > 0:
+            exponents.append(
+                log(current["seconds"] / previous["seconds"])
+                / log(current["size"] / previous["size"])
+            )
+        else:
+            exponents.append(None)
+    return exponents
+
+
+def find_regressions(
+    results: dict[str, list[dict]],
+    baseline: dict[str, list[dict]],
+    time_tolerance: float,
+    memory_tolerance: float,
+) -> list[str]:
+    regressions = []
+    for name, case_results in results.items():
+        baseline_by_size = {result["size"]: result for result in baseline.get(name, [])}
+        for result in case_results:
+            if (old := baseline_by_size.get(result["size"])) is None:
+                continue
+            if result["seconds"] > max(
+                old["seconds"] * (1 + time_tolerance),
+                old["seconds"] + MIN_SECONDS_REGRESSION,
+            ):
+                regressions.append(
+                    f"{name} at size {result['size']}: {result['seconds']:.3f}s "
+                    f"vs {old['seconds']:.3f}s"
+                )
+            if (
+                result["peak_memory"] is not None
+                and old.get("peak_memory") is not None
+                and result["peak_memory"] > old["peak_memory"] * (1 + memory_tolerance)
+            ):
+                regressions.append(
+                    f"{name} at size {result['size']}: "
+                    f"{result['peak_memory'] / (1024 * 1024):.1f} MiB vs "
+                    f"{old['peak_memory'] / (1024 * 1024):.1f} MiB"
+                )
+    return regressions
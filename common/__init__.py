@@ -0,0 +1,8 @@
+"""Advent of Code 2025 Shared Helpers
+
+author: Dan Blanchard
+"""
+
+# The day scripts are run directly, like python 5/py/solve.py, so this package
+# isn't on the import path for them. Each one adds the repository root, two
+# directories above the script, to sys.path before importing from here.
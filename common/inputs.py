@@ -0,0 +1,205 @@
+"""Advent of Code 2025 Input Loading
+
+author: Dan Blanchard
+"""
+
+import mmap
+import re
+from typing import Iterator
+
+import numpy as np
+
+NEWLINE = ord("\n")
+MINUS = ord("-")
+# Lines that are empty after stripping, so "\r\n" line endings and lines of
+# only spaces count as blank
+BLANK_LINE = re.compile(rb"^[ \t\r\x0b\x0c]*$", re.MULTILINE)
+
+# Longest run of digits that always fits in an int64. Longer ones are parsed
+# as Python ints instead.
+MAX_DIGITS = 18
+
+# Bytes searched at a time, so that searching a mapped file never copies
+# much of it
+SEARCH_BLOCK_SIZE = 1 << 20
+
+
+def map_input(input_file: str) -> memoryview:
+    # The mapping stays open for as long as any view of it is alive, so
+    # slices and arrays made from it never need copying out first
+    with open(input_file, "rb") as file:
+        try:
+            return memoryview(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+        except ValueError:
+            # Empty files can't be mapped
+            return memoryview(b"")
+
+
+def as_byte_array(buffer) -> np.ndarray:
+    return np.frombuffer(buffer, dtype=np.uint8)
+
+
+def find(buffer, sub: bytes, start: int = 0) -> int:
+    view = memoryview(buffer)
+    while start < len(view):
+        end = min(start + SEARCH_BLOCK_SIZE + len(sub) - 1, len(view))
+        if (i := bytes(view[start:end]).find(sub)) != -1:
+            return start + i
+        start += SEARCH_BLOCK_SIZE
+    return -1
+
+
+def line_bounds(buffer) -> tuple[np.ndarray, np.ndarray]:
+    # Start and end (without the newline) of every line, where a final line
+    # only counts if it isn't empty
+    buf = as_byte_array(buffer)
+    ends = np.flatnonzero(buf == NEWLINE)
+    if len(buf) and buf[-1] != NEWLINE:
+        ends = np.append(ends, len(buf))
+    starts = np.concatenate(([0], ends[:-1] + 1)).astype(ends.dtype)
+    return starts, ends
+
+
+def split_lines(buffer) -> list[memoryview]:
+    view = memoryview(buffer)
+    starts, ends = line_bounds(view)
+    return [view[start:end] for start, end in zip(starts.tolist(), ends.tolist())]
+
+
+def split_sections(buffer, maxsplit: int = -1) -> list[memoryview]:
+    # Sections are separated by blank lines, like day 5's ranges and
+    # ingredients. Like str.split, at most maxsplit separators are used when
+    # it isn't negative, and the last section keeps any blank lines after.
+    # Searching with a regular expression reads the mapping in place, and
+    # stops once enough separators are found.
+    view = memoryview(buffer)
+    sections = []
+    start = 0
+    for match in BLANK_LINE.finditer(view):
+        if len(sections) == maxsplit:
+            break
+        # The end of a file ending in a newline isn't a line of its own
+        if match.start() == len(view):
+            break
+        sections.append(view[start : match.start()])
+        start = min(match.end() + 1, len(view))
+    sections.append(view[start:])
+    return sections
+
+
+def split_blocks(buffer, block_size: int) -> Iterator[memoryview]:
+    # Blocks of about block_size bytes that always end after a newline, so
+    # no line is split between two of them
+    view = memoryview(buffer)
+    start = 0
+    while start < len(view):
+        end = find(view, b"\n", start + block_size) + 1 or len(view)
+        yield view[start:end]
+        start = end
+
+
+def find_digit_runs(buf: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    # Padding by hand keeps the edges int8, where np.diff's prepend would
+    # make them int64
+    is_digit = np.zeros(len(buf) + 2, dtype=np.int8)
+    is_digit[1:-1] = (buf >= ord("0")) & (buf <= ord("9"))
+    edges = np.diff(is_digit)
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def digit_run_values(
+    buf: np.ndarray, starts: np.ndarray, ends: np.ndarray
+) -> np.ndarray:
+    lengths = ends - starts
+    max_length = int(lengths.max()) if len(lengths) else 0
+    if max_length > MAX_DIGITS:
+        # Too long for int64, so fall back to an array of Python ints
+        return np.array(
+            [
+                int(buf[start:end].tobytes())
+                for start, end in zip(starts.tolist(), ends.tolist())
+            ],
+            dtype=object,
+        )
+    # Horner's method over every number at once, one digit position at a
+    # time, with numbers that are already finished left alone
+    values = np.zeros(len(starts), dtype=np.int64)
+    last = len(buf) - 1
+    for position in range(max_length):
+        digits = buf[np.minimum(starts + position, last)].astype(np.int64) - ord("0")
+        values = np.where(lengths > position, values * 10 + digits, values)
+    return values
+
+
+def is_negative(buf: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    # A "-" right before a run of digits is a sign, unless it directly
+    # follows another digit, where it separates the two ends of a range.
+    # Clamping only ever looks at the run's own first digit, which isn't "-".
+    before = buf[np.maximum(starts - 1, 0)]
+    two_before = buf[np.maximum(starts - 2, 0)]
+    after_digit = (starts >= 2) & (two_before >= ord("0")) & (two_before <= ord("9"))
+    return (before == MINUS) & ~after_digit
+
+
+def parse_ints(buffer) -> np.ndarray:
+    # Every integer, in order, with anything else as a separator. A "-" after
+    # a digit is a separator too, so "a-b" ranges come out as two values,
+    # while "-a" and "a--b" are negative.
+    buf = as_byte_array(buffer)
+    starts, ends = find_digit_runs(buf)
+    values = digit_run_values(buf, starts, ends)
+    negative = is_negative(buf, starts)
+    values[negative] = -values[negative]
+    return values
+
+
+def parse_int_records(buffer, record_length: int) -> np.ndarray:
+    # Groups of record_length integers, like "a-b" ranges or "x,y,z" triples
+    values = parse_ints(buffer)
+    if len(values) % record_length:
+        raise ValueError(
+            f"Expected records of {record_length} integers, but found {len(values)} "
+            "integers in total"
+        )
+    return values.reshape(-1, record_length)
+
+
+def parse_prefixed_ints(buffer, prefixes: bytes) -> tuple[np.ndarray, np.ndarray]:
+    # Integers that each directly follow one of prefixes, like day 1's L68,
+    # along with the index in prefixes of the byte in front of each
+    buf = as_byte_array(buffer)
+    starts, ends = find_digit_runs(buf)
+    prefix_codes = np.frombuffer(prefixes, dtype=np.uint8)
+    is_prefix = np.isin(buf, prefix_codes)
+    if (
+        np.count_nonzero(is_prefix) != len(starts)
+        or (len(starts) and starts[0] == 0)
+        or not is_prefix[starts - 1].all()
+    ):
+        raise ValueError(f"Every integer must directly follow one of {prefixes!r}")
+    prefix_indices = np.zeros(256, dtype=np.int64)
+    prefix_indices[prefix_codes] = np.arange(len(prefix_codes))
+    return prefix_indices[buf[starts - 1]], digit_run_values(buf, starts, ends)
+
+
+def read_grid(buffer, fill: bytes | None = None) -> np.ndarray:
+    # Rows of a character grid as a 2-D array of bytes. When every row is
+    # the same width this is a view of buffer that skips over the newlines.
+    # Otherwise short rows are padded with fill, if given, in a copy.
+    buf = as_byte_array(buffer)
+    starts, ends = line_bounds(buf)
+    if not len(ends):
+        return np.zeros((0, 0), dtype=np.uint8)
+    width = int(ends[0])
+    if (ends - starts == width).all():
+        return np.lib.stride_tricks.as_strided(
+            buf, shape=(len(ends), width), strides=(width + 1, 1), writeable=False
+        )
+    if fill is None:
+        raise ValueError("Every row of the grid must be the same width")
+    lengths = ends - starts
+    columns = np.arange(lengths.max())
+    in_row = columns < lengths[:, None]
+    grid = np.full((len(ends), len(columns)), fill[0], dtype=np.uint8)
+    grid[in_row] = buf[(starts[:, None] + columns)[in_row]]
+    return grid
@@ -0,0 +1,128 @@
+"""Advent of Code 2025 Runner
+
+author: Dan Blanchard
+"""
+
+from contextlib import redirect_stdout
+import importlib.util
+import inspect
+import io
+from pathlib import Path
+import sys
+import time
+
+from .cache import ResultCache, result_key
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+
+# Module functions with this prefix count as parsing when timing a day
+PARSE_PREFIX = "parse_"
+
+# Arguments main() requires that the day scripts normally get from argparse
+DEFAULT_PARAMS = {
+    3: {"n": [2]},
+    6: {"col_numbers": False},
+    8: {"n": None},
+}
+
+
+def find_day_scripts() -> dict[int, Path]:
+    # Every day lives in a numbered directory with a single script in py/
+    scripts = {}
+    for script in REPO_DIR.glob("*/py/*.py"):
+        day_dir = script.parent.parent.name
+        if day_dir.isdigit():
+            scripts[int(day_dir)] = script
+    return dict(sorted(scripts.items()))
+
+
+def load_day(script: Path):
+    # Named under this package so it can't collide with any other module, and
+    # registered so that the functions some days send to a process pool can
+    # be pickled by reference
+    spec = importlib.util.spec_from_file_location(
+        f"{__name__}.day{script.parent.parent.name}", script
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+class ParseTimer:
+    def __init__(self, module):
+        self.module = module
+        self.seconds = 0.0
+        self.depth = 0
+        self.originals = {
+            name: function
+            for name, function in vars(module).items()
+            if name.startswith(PARSE_PREFIX)
+            and inspect.isfunction(function)
+            # Calling a generator function does none of the work
+            and not inspect.isgeneratorfunction(function)
+        }
+
+    def wrap(self, function):
+        def timed(*args, **kwargs):
+            # Only the outermost call counts, since parse_input_file usually
+            # calls parse_line
+            self.depth += 1
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.depth -= 1
+                if not self.depth:
+                    self.seconds += time.perf_counter() - start
+
+        return timed
+
+    def __enter__(self):
+        # The day's own functions look these up as globals, so replacing the
+        # module attributes is enough to time every call
+        for name, function in self.originals.items():
+            setattr(self.module, name, self.wrap(function))
+        return self
+
+    def __exit__(self, *exc_info):
+        for name, function in self.originals.items():
+            setattr(self.module, name, function)
+
+
+def run_day(
+    day: int,
+    script: Path,
+    input_file: str,
+    params: dict,
+    cache: ResultCache | None = None,
+) -> dict:
+    result = {"day": day, "input_file": input_file, "params": params, "cached": False}
+    output = io.StringIO()
+    start = time.perf_counter()
+    key = None
+    try:
+        if cache is not None:
+            key = result_key(input_file, script, params)
+            if (entry := cache.get(key)) is not None:
+                result["cached"] = True
+                result["total_seconds"] = time.perf_counter() - start
+                result["output"] = entry["output"]
+                return result
+        module = load_day(script)
+        with ParseTimer(module) as parse_timer, redirect_stdout(output):
+            solve_start = time.perf_counter()
+            module.main(input_file=input_file, verbose=False, **params)
+            main_seconds = time.perf_counter() - solve_start
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    else:
+        # Days without a parse_ function, or that parse as they go, only get
+        # a parse time for what went through those functions
+        result["parse_seconds"] = parse_timer.seconds if parse_timer.originals else None
+        result["solve_seconds"] = main_seconds - parse_timer.seconds
+    result["total_seconds"] = time.perf_counter() - start
+    result["output"] = output.getvalue().splitlines()
+    if key is not None and "error" not in result:
+        cache.put(key, {"output": result["output"]})
+    return result
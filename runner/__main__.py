@@ -0,0 +1,179 @@
+"""Advent of Code 2025 Runner
+
+author: Dan Blanchard
+"""
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import json
+from pathlib import Path
+import sys
+import time
+
+from . import DEFAULT_PARAMS, find_day_scripts, run_day
+from .cache import DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES, ResultCache
+
+
+def parse_param(param: str) -> tuple[int, str, object]:
+    # DAY:KEY=VALUE, with VALUE read as JSON when it can be
+    day, _, assignment = param.partition(":")
+    key, _, value = assignment.partition("=")
+    if not day.isdigit() or not key or not value:
+        raise argparse.ArgumentTypeError(f"Expected DAY:KEY=VALUE, not {param!r}")
+    try:
+        value = json.loads(value)
+    except json.JSONDecodeError:
+        pass
+    return int(day), key, value
+
+
+def format_seconds(seconds: float | None) -> str:
+    return "-" if seconds is None else f"{seconds:.3f}s"
+
+
+def main(
+    *,
+    days: list[int],
+    input_name: str,
+    jobs: int,
+    params: list[tuple[int, str, object]],
+    json_output: bool,
+    output_file: str | None,
+    use_cache: bool = True,
+    cache_dir: str | Path = DEFAULT_CACHE_DIR,
+    cache_size: int = DEFAULT_MAX_BYTES,
+) -> int:
+    scripts = find_day_scripts()
+    day_params = {day: dict(DEFAULT_PARAMS.get(day, {})) for day in days}
+    for day, key, value in params:
+        day_params.setdefault(day, {})[key] = value
+
+    cache = ResultCache(cache_dir, cache_size) if use_cache else None
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=jobs or None) as executor:
+        futures = [
+            executor.submit(
+                run_day,
+                day,
+                scripts[day],
+                str(scripts[day].parent.parent / f"{input_name}.txt"),
+                day_params[day],
+                cache,
+            )
+            for day in days
+        ]
+        results = [future.result() for future in futures]
+    summary = {"wall_seconds": time.perf_counter() - start, "days": results}
+
+    if output_file:
+        with open(output_file, "w") as file:
+            json.dump(summary, file, indent=2)
+    if json_output:
+        json.dump(summary, sys.stdout, indent=2)
+        print()
+    else:
+        for result in results:
+            if result["cached"]:
+                print(
+                    f"Day {result['day']}: cached, "
+                    f"total {format_seconds(result['total_seconds'])}"
+                )
+            else:
+                print(
+                    f"Day {result['day']}: parse {format_seconds(result.get('parse_seconds'))}, "
+                    f"solve {format_seconds(result.get('solve_seconds'))}, "
+                    f"total {format_seconds(result['total_seconds'])}"
+                )
+            for line in result["output"]:
+                print(f"  {line}")
+            if "error" in result:
+                print(f"  Failed with {result['error']}")
+        print(f"Wall time: {format_seconds(summary['wall_seconds'])}")
+    return 1 if any("error" in result for result in results) else 0
+
+
+if __name__ == "__main__":
+    scripts = find_day_scripts()
+    parser = argparse.ArgumentParser(
+        description="Run several days of Advent of Code at once."
+    )
+    parser.add_argument(
+        "days",
+        type=int,
+        nargs="*",
+        help=f"Days to run (default: all). Choices: {', '.join(map(str, scripts))}",
+    )
+    parser.add_argument(
+        "--input",
+        "-i",
+        dest="input_name",
+        type=str,
+        default="input",
+        help="Name of the input file in each day's directory, without .txt",
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=0,
+        help="Number of days to run at once (default: one per CPU)",
+    )
+    parser.add_argument(
+        "--param",
+        "-p",
+        dest="params",
+        type=parse_param,
+        action="append",
+        default=[],
+        help="Extra main() argument for one day, like 8:n=1000 or 4:backend=lists",
+    )
+    parser.add_argument(
+        "--json",
+        dest="json_output",
+        action="store_true",
+        help="Print the summary as JSON instead of text",
+    )
+    parser.add_argument(
+        "--output",
+        "-o",
+        dest="output_file",
+        type=str,
+        help="Also write the JSON summary to this file",
+    )
+    parser.add_argument(
+        "--no-cache",
+        dest="use_cache",
+        action="store_false",
+        help="Always run the solvers, without reading or writing cached answers",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        default=DEFAULT_CACHE_DIR,
+        help=f"Directory for cached answers (default: {DEFAULT_CACHE_DIR})",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=float,
+        default=DEFAULT_MAX_BYTES / (1024 * 1024),
+        help="Size in MiB the cache is trimmed to, dropping the least recently used answers",
+    )
+    args = parser.parse_args()
+    unknown_days = set(args.days) - set(scripts)
+    if unknown_days:
+        parser.error(f"Unknown days: {', '.join(map(str, sorted(unknown_days)))}")
+
+    sys.exit(
+        main(
+            days=args.days or list(scripts),
+            input_name=args.input_name,
+            jobs=args.jobs,
+            params=args.params,
+            json_output=args.json_output,
+            output_file=args.output_file,
+            use_cache=args.use_cache,
+            cache_dir=args.cache_dir,
+            cache_size=int(args.cache_size * 1024 * 1024),
+        )
+    )
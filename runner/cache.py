@@ -0,0 +1,89 @@
+"""Advent of Code 2025 Result Cache
+
+author: Dan Blanchard
+"""
+
+import fcntl
+import hashlib
+import json
+import os
+from pathlib import Path
+import tempfile
+
+DEFAULT_CACHE_DIR = (
+    Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache"))
+    / "advent-of-code-2025"
+)
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# Shared modules the day scripts import, which can change their answers too
+SHARED_SOURCE_DIR = Path(__file__).resolve().parent.parent / "common"
+
+
+def hash_file(path: Path) -> str:
+    with open(path, "rb") as file:
+        return hashlib.file_digest(file, "sha256").hexdigest()
+
+
+def result_key(input_file: str, script: Path, params: dict) -> str:
+    key = hashlib.sha256()
+    key.update(hash_file(Path(input_file)).encode())
+    for source in [script, *sorted(SHARED_SOURCE_DIR.glob("*.py"))]:
+        key.update(hash_file(source).encode())
+    key.update(json.dumps(params, sort_keys=True).encode())
+    return key.hexdigest()
+
+
+class ResultCache:
+    def __init__(
+        self, cache_dir: str | Path = DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+
+    def entry_path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> dict | None:
+        path = self.entry_path(key)
+        try:
+            with open(path, "r") as file:
+                entry = json.load(file)
+            # The modification time doubles as the last use for eviction
+            os.utime(path)
+        except (FileNotFoundError, json.JSONDecodeError):
+            # Another process may have just evicted it
+            return None
+        return entry
+
+    def put(self, key: str, entry: dict):
+        path = self.entry_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Readers only ever see complete entries, since the rename is atomic,
+        # and processes writing the same key write the same answers
+        with tempfile.NamedTemporaryFile(
+            "w", dir=path.parent, suffix=".tmp", delete=False
+        ) as file:
+            json.dump(entry, file)
+        os.replace(file.name, path)
+        self.evict()
+
+    def evict(self):
+        # One process at a time, so that two of them don't both delete the
+        # oldest entries to make room for the same bytes
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.cache_dir / ".lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            entries = []
+            for path in self.cache_dir.glob("*/*.json"):
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, path))
+            total_bytes = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total_bytes <= self.max_bytes:
+                    break
+                path.unlink(missing_ok=True)
+                total_bytes -= size